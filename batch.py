@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import shutil
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from subtitles import synthesize_with_timings, captions_path
+from gen_assets_real import VOICE, load_real_assets, decide_image, render_image
+
+# --- CONFIGURATION ---
+BATCH_FILE = "batch.json"
+POOL_DIR = os.path.join("cache", "asset_pool")
+BATCH_OUTPUT_DIR = "batch_output"
+
+# Global concurrency budget shared by every variant, plus per-stage caps
+MAX_CONCURRENT_JOBS = 6
+TTS_CONCURRENCY = 4       # network bound
+DIFFUSION_CONCURRENCY = 1 # one model on one GPU
+ENCODE_CONCURRENCY = 2    # each libx264 encode is already multi-threaded
+
+# batch.json:
+# {
+#     "variants": [
+#         {"name": "full", "plan": "video_plan.json"},
+#         {"name": "mining_dept", "plan": "plans/mining.json", "output": "out/mining.mp4"}
+#     ]
+# }
+
+def load_batch(path=BATCH_FILE):
+    with open(path, 'r') as f:
+        batch = json.load(f)
+    variants = []
+    for variant in batch['variants']:
+        name = variant.get('name') or os.path.splitext(os.path.basename(variant['plan']))[0]
+        if any(v['name'] == name for v in variants):
+            # Same name means the same batch_output/<name>/assets folder
+            raise ValueError(f"Duplicate variant name '{name}' in {path}")
+        with open(variant['plan'], 'r') as f:
+            plan = json.load(f)
+        variants.append({
+            "name": name,
+            "plan": plan,
+            "assets_dir": os.path.join(BATCH_OUTPUT_DIR, name, "assets"),
+            "output": variant.get('output') or os.path.join(BATCH_OUTPUT_DIR, name, f"{name}.mp4"),
+        })
+    return variants
+
+def _key(*parts):
+    return hashlib.sha1("\n".join(parts).encode('utf-8')).hexdigest()[:20]
+
+def collect_jobs(variants, real_assets=None):
+    """Maps every segment onto content-addressed pool jobs, so identical work runs once.
+
+    Images follow gen_assets_real's decisions (real photo, img2img restyle or seeded txt2img),
+    made per variant exactly as a standalone run of that plan would, and are keyed by decision.
+    """
+    real_images, real_by_path, image_index = real_assets or load_real_assets()
+    audio_jobs = {}
+    image_jobs = {}
+    for variant in variants:
+        variant['links'] = []
+        used_images = set()
+        for segment in variant['plan']['segments']:
+            narration = segment['narration']
+            decision = decide_image(segment, real_images, used_images, image_index, real_by_path)
+            if decision.get('source'):
+                used_images.add(decision['source'])
+
+            audio_key = _key("tts", VOICE, narration)
+            image_key = _key(decision['kind'], decision.get('source') or "", decision.get('style') or "",
+                             str(decision.get('seed')), segment['image_prompt'])
+            audio_jobs.setdefault(audio_key, narration)
+            image_jobs.setdefault(image_key, (segment, decision))
+
+            seg_id = segment['id']
+            variant['links'] += [
+                (os.path.join(POOL_DIR, f"audio_{audio_key}.mp3"), os.path.join(variant['assets_dir'], f"audio_{seg_id}.mp3")),
+                (os.path.join(POOL_DIR, f"captions_{audio_key}.json"), os.path.join(variant['assets_dir'], f"captions_{seg_id}.json")),
+                (os.path.join(POOL_DIR, f"image_{image_key}.jpg"), os.path.join(variant['assets_dir'], f"image_{seg_id}.jpg")),
+            ]
+            variant.setdefault('needs', set()).update({audio_key, image_key})
+    return audio_jobs, image_jobs
+
+def link_asset(src, dst):
+    """Exposes a pooled asset under the per-variant name editor.py expects."""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy(src, dst)
+
+class Scheduler:
+    def __init__(self):
+        self.budget = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+        self.tts = asyncio.Semaphore(TTS_CONCURRENCY)
+        self.diffusion = asyncio.Semaphore(DIFFUSION_CONCURRENCY)
+        self.encode = asyncio.Semaphore(ENCODE_CONCURRENCY)
+        self.encoder_pool = ProcessPoolExecutor(max_workers=ENCODE_CONCURRENCY)
+        self.done = {}  # pool key -> Task
+
+    async def _run(self, stage, coro_fn):
+        async with stage, self.budget:
+            return await coro_fn()
+
+    async def audio(self, key, narration):
+        path = os.path.join(POOL_DIR, f"audio_{key}.mp3")
+        if os.path.exists(path) and os.path.exists(captions_path(path)):
+            return
+        print(f"🎙️ TTS {key}")
+        await self._run(self.tts, lambda: synthesize_with_timings(narration, VOICE, path, captions_path(path)))
+
+    async def image(self, key, job):
+        path = os.path.join(POOL_DIR, f"image_{key}.jpg")
+        if os.path.exists(path) and os.path.getsize(path) > 1000:
+            return
+        segment, decision = job
+        print(f"🎨 Image {key} ({decision['kind']})")
+        await self._run(self.diffusion, lambda: asyncio.to_thread(render_image, segment, decision, path))
+
+    async def render(self, variant):
+        # Encode as soon as this variant's own assets exist, even if others are still generating
+        await asyncio.gather(*(self.done[key] for key in variant['needs']))
+        os.makedirs(variant['assets_dir'], exist_ok=True)
+        for src, dst in variant['links']:
+            if os.path.exists(src):
+                link_asset(src, dst)
+        plan_file = os.path.join(os.path.dirname(variant['assets_dir']), "video_plan.json")
+        with open(plan_file, 'w') as f:
+            json.dump(variant['plan'], f, indent=4)
+        output_dir = os.path.dirname(variant['output'])
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        print(f"🎬 Encoding {variant['name']} -> {variant['output']}")
+        loop = asyncio.get_running_loop()
+        await self._run(self.encode, lambda: loop.run_in_executor(
+            self.encoder_pool, _encode, plan_file, variant['assets_dir'], variant['output']))
+        print(f"✅ {variant['name']} done.")
+
+def _encode(plan_file, assets_dir, output_video):
+    from editor import create_video  # imported in the encoder process only
+    create_video(plan_file, assets_dir, output_video)
+
+async def main(batch_file=BATCH_FILE):
+    if not os.path.exists(batch_file):
+        print(f"❌ {batch_file} not found.")
+        return
+    os.makedirs(POOL_DIR, exist_ok=True)
+
+    variants = load_batch(batch_file)
+    audio_jobs, image_jobs = collect_jobs(variants)
+    total_segments = sum(len(v['plan']['segments']) for v in variants)
+    print(f"🚀 {len(variants)} variants, {total_segments} segments -> "
+          f"{len(audio_jobs)} unique narrations, {len(image_jobs)} unique images")
+
+    scheduler = Scheduler()
+    for key, narration in audio_jobs.items():
+        scheduler.done[key] = asyncio.create_task(scheduler.audio(key, narration))
+    for key, job in image_jobs.items():
+        scheduler.done[key] = asyncio.create_task(scheduler.image(key, job))
+
+    results = await asyncio.gather(*(scheduler.render(v) for v in variants), return_exceptions=True)
+    scheduler.encoder_pool.shutdown()
+    failures = {}
+    for variant, result in zip(variants, results):
+        if isinstance(result, Exception):
+            failures[variant['name']] = f"{type(result).__name__}: {result}"
+            print(f"❌ {variant['name']} failed: {result}")
+    print(f"🎉 Batch finished. Outputs are under '{BATCH_OUTPUT_DIR}'.")
+    return failures
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else BATCH_FILE))
@@ -0,0 +1,290 @@
+import os
+import sys
+import json
+import time
+import wave
+import random
+import asyncio
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+# Synthetic end-to-end benchmarks. Builds a fake GenAI-FD-Dataset tree and video plan of a
+# chosen size, swaps the TTS / LLM / diffusion backends for local stubs and times every stage,
+# so performance can be tracked without the real dataset or any API keys.
+
+# --- CONFIGURATION ---
+RESULTS_DIR = "bench_results"
+SCALES = {
+    "small":  {"articles": 20,   "pdf_pages": 3, "images_per_article": 2, "segments": 8},
+    "medium": {"articles": 200,  "pdf_pages": 3, "images_per_article": 3, "segments": 60},
+    "large":  {"articles": 1000, "pdf_pages": 5, "images_per_article": 3, "segments": 200},
+}
+STAGES = ["crawl", "match", "assets", "batch", "edit"]
+STUB_TTS_SECONDS = 0.02       # simulated TTS round trip
+STUB_DIFFUSION_SECONDS = 0.05 # simulated image generation
+STUB_AUDIO_RATE = 8000
+IMAGE_SIZE = (640, 360)
+SEED = 1926
+
+WORDS = ("history established legacy campus convocation ranking president director opening coal "
+         "mining petroleum earth department alumni jubilee centenary dhanbad school mines students "
+         "laboratory research geology engineering hostel library founders lecture award").split()
+YEARS = [1926, 1940, 1957, 1968, 1976, 1990, 2001, 2016, 2020, 2026]
+
+# --- 1. SYNTHETIC DATASET ---
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def write_pdf(path, pages):
+    """Minimal text PDF (one Helvetica text block per page), no PDF library needed."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        safe = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 11 Tf 50 750 Td ({safe}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+def write_image(path, rng):
+    from PIL import Image, ImageDraw
+    image = Image.new("RGB", IMAGE_SIZE, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(8):
+        x, y = rng.randrange(IMAGE_SIZE[0]), rng.randrange(IMAGE_SIZE[1])
+        draw.rectangle((x, y, x + 80, y + 60), fill=tuple(rng.randrange(256) for _ in range(3)))
+    image.save(path, quality=85)
+
+def make_dataset(root, articles, pdf_pages, images_per_article, seed=SEED):
+    """news_articles/<YYYY-MM-DD>_<n>/ with index.html, a multi-page PDF and photos."""
+    rng = random.Random(seed)
+    base = os.path.join(root, "news_articles")
+    story_pool = [" ".join(sentence(rng) for _ in range(8)) for _ in range(max(1, articles // 3))]
+    for n in range(articles):
+        year = rng.choice(YEARS[:-1])
+        folder = os.path.join(base, f"{year}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}_{n}")
+        os.makedirs(folder, exist_ok=True)
+        # Re-published stories (near duplicates) exercise the dedup stage
+        story = rng.choice(story_pool) if rng.random() < 0.4 else " ".join(sentence(rng) for _ in range(8))
+        with open(os.path.join(folder, "index.html"), "w", encoding="utf-8") as f:
+            f.write(f"<html><body><h1>{year} {sentence(rng, 5)}</h1><p>{story}</p></body></html>")
+        write_pdf(os.path.join(folder, f"report_{n}.pdf"), [sentence(rng, 20) for _ in range(pdf_pages)])
+        for i in range(images_per_article):
+            write_image(os.path.join(folder, f"photo_{i}.jpg"), rng)
+
+def make_plan(segments, seed=SEED):
+    """Synthetic video_plan.json in the shape gen_script.py produces (the LLM stub)."""
+    rng = random.Random(seed + 1)
+    plan = {"segments": []}
+    for i in range(segments):
+        year = YEARS[min(len(YEARS) - 1, i * len(YEARS) // max(1, segments))]
+        plan["segments"].append({
+            "id": i + 1,
+            "narration": f"In {year}, " + " ".join(sentence(rng, 9) for _ in range(2)),
+            "image_prompt": f"{year} campus photograph, " + ", ".join(rng.sample(WORDS, 4)),
+        })
+    return plan
+
+# --- 2. STUB BACKENDS ---
+async def stub_tts(text, voice, audio_path, timings_path):
+    """Silent audio of the predicted narration length plus evenly spaced word timings."""
+    from duration_planner import raw_estimate
+    await asyncio.sleep(STUB_TTS_SECONDS)
+    duration = raw_estimate(text)
+    with wave.open(audio_path, "wb") as w:  # ffmpeg probes content, so the .mp3 name is fine
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(STUB_AUDIO_RATE)
+        w.writeframes(b"\0\0" * int(duration * STUB_AUDIO_RATE))
+    words = text.split()
+    step = duration / max(1, len(words))
+    with open(timings_path, "w", encoding="utf-8") as f:
+        json.dump([{"text": w, "start": i * step, "end": (i + 0.8) * step} for i, w in enumerate(words)], f)
+
+def stub_generate(kind, params, priority=0):
+    """Stands in for gen_worker.generate: a solid-colour still after a fixed delay."""
+    time.sleep(STUB_DIFFUSION_SECONDS)
+    rng = random.Random(params["filename"])
+    write_image(params["filename"], rng)
+    return {"filename": params["filename"]}
+
+def stub_encode(plan_file, assets_dir, output_video):
+    """Stands in for batch._encode (encoding is timed in "edit"); module-level so it pickles."""
+    return None
+
+# --- 3. STAGES ---
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def timed(fn):
+    start = time.perf_counter()
+    with quiet():
+        extra = fn() or {}
+    return {"seconds": round(time.perf_counter() - start, 4), **extra}
+
+def stage_crawl(workdir, scale):
+    import data_loader
+    data_loader.main()
+    with open(data_loader.OUTPUT_DATA_FILE) as f:
+        facts = len(json.load(f))
+    with open(data_loader.OUTPUT_ASSETS_FILE) as f:
+        images = len(json.load(f))
+    return {"facts": facts, "images": images}
+
+def stage_match(workdir, scale):
+    from gen_assets_real import get_real_image, target_year_for
+    from text_index import load_index
+    with open("available_assets.json") as f:
+        assets = json.load(f)
+    with open("video_plan.json") as f:
+        plan = json.load(f)
+    by_path = {a['path']: a for a in assets}
+    index = load_index()
+
+    def run(use_index):
+        used = set()
+        start = time.perf_counter()
+        for segment in plan['segments']:
+            text = segment['narration'].lower()
+            match = get_real_image(target_year_for(text), assets, used,
+                                   text if use_index else None, index if use_index else None, by_path)
+            if match:
+                used.add(match['path'])
+        return round(time.perf_counter() - start, 4)
+
+    return {"indexed_seconds": run(True), "year_scan_seconds": run(False), "assets": len(assets)}
+
+def stage_assets(workdir, scale):
+    import gen_assets_real
+    gen_assets_real.synthesize_with_timings = stub_tts
+    gen_assets_real.generate = stub_generate
+    gen_assets_real.STYLIZE_REAL_PHOTOS = False  # copying real photos keeps the stage backend-free
+    asyncio.run(gen_assets_real.main())
+    return {"segments": scale["segments"]}
+
+def stage_batch(workdir, scale):
+    import batch
+    import gen_assets_real
+    batch.synthesize_with_timings = stub_tts
+    gen_assets_real.generate = stub_generate  # batch renders images through gen_assets_real.render_image
+    batch._encode = stub_encode
+    with open("video_plan.json") as f:
+        plan = json.load(f)
+    half = {"segments": plan["segments"][: max(1, len(plan["segments"]) // 2)]}
+    with open("short_plan.json", "w") as f:
+        json.dump(half, f)
+    with open("batch.json", "w") as f:
+        json.dump({"variants": [{"name": "full", "plan": "video_plan.json"},
+                                {"name": "short", "plan": "short_plan.json"}]}, f)
+    failures = asyncio.run(batch.main("batch.json"))
+    if failures:
+        raise RuntimeError("; ".join(f"{name}: {error}" for name, error in failures.items()))
+    return {"variants": 2}
+
+def stage_edit(workdir, scale):
+    import editor
+    editor.create_video()
+    return {"output_bytes": os.path.getsize(editor.OUTPUT_VIDEO)}
+
+STAGE_FUNCTIONS = {
+    "crawl": stage_crawl, "match": stage_match, "assets": stage_assets,
+    "batch": stage_batch, "edit": stage_edit,
+}
+
+def run_scale(name, scale, stages):
+    results = {}
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+        try:
+            start = time.perf_counter()
+            make_dataset(workdir, scale["articles"], scale["pdf_pages"], scale["images_per_article"])
+            with open(os.path.join(workdir, "video_plan.json"), "w") as f:
+                json.dump(make_plan(scale["segments"]), f)
+            results["generate_dataset"] = {"seconds": round(time.perf_counter() - start, 4)}
+        except Exception as e:
+            return {"generate_dataset": {"error": f"{type(e).__name__}: {e}"}}
+
+        os.chdir(workdir)
+        try:
+            for stage in stages:
+                try:
+                    results[stage] = timed(lambda: STAGE_FUNCTIONS[stage](workdir, scale))
+                except BaseException as e:  # editor exits via sys.exit when MoviePy is missing
+                    if isinstance(e, KeyboardInterrupt):
+                        raise
+                    results[stage] = {"error": f"{type(e).__name__}: {e}"}
+                status = results[stage].get("seconds", results[stage].get("error"))
+                print(f"   {name:>6} {stage:<8} {status}")
+        finally:
+            os.chdir(original_cwd)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except:
+        return None
+
+def compare(current, previous_path):
+    """Prints per-stage time ratios against an earlier results file."""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"📊 Compared with {previous_path} ({previous.get('commit')}):")
+    for scale, stages in current["results"].items():
+        for stage, result in stages.items():
+            old = previous.get("results", {}).get(scale, {}).get(stage, {})
+            if "seconds" in result and old.get("seconds"):
+                ratio = result["seconds"] / old["seconds"]
+                flag = "⚠️" if ratio > 1.2 else "  "
+                print(f"   {flag} {scale:>6} {stage:<16} {old['seconds']:.3f}s -> {result['seconds']:.3f}s ({ratio:.2f}x)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic end-to-end pipeline benchmarks")
+    parser.add_argument("--scales", default="small", help=f"comma-separated: {', '.join(SCALES)}")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated: {', '.join(STAGES)}")
+    parser.add_argument("--out", help="results file (default: bench_results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    stages = args.stages.split(",")
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "stub_latency": {"tts": STUB_TTS_SECONDS, "diffusion": STUB_DIFFUSION_SECONDS},
+        "results": {},
+    }
+    for name in args.scales.split(","):
+        print(f"🏁 Scale '{name}': {SCALES[name]}")
+        report["results"][name] = {"config": SCALES[name], **run_scale(name, SCALES[name], stages)}
+
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"💾 Results written to {out}")
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import json
+import hashlib
+import contextlib
+
+# --- CONFIGURATION ---
+JOURNAL_FILE = "generation_journal.jsonl"
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """Yields a temp path next to `path` and renames it into place only if the block succeeds.
+
+    A crash mid-write leaves at most a stray temp file, never a truncated asset under the final
+    name, so existence checks on `path` can be trusted. The temp name keeps the extension so
+    PIL/ffmpeg still infer the format.
+    """
+    stem, ext = os.path.splitext(path)
+    tmp_path = f"{stem}.tmp-{os.getpid()}{ext}"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def segment_fingerprint(segment):
+    """Changes whenever the text that drives a segment's assets changes."""
+    return hashlib.sha1(f"{segment['narration']}\n{segment['image_prompt']}".encode('utf-8')).hexdigest()[:16]
+
+def segment_seed(segment):
+    """Deterministic diffusion seed, so a regenerated segment reproduces the same image."""
+    return int(segment_fingerprint(segment)[:8], 16)
+
+class GenerationJournal:
+    """Append-only JSONL log of completed segment decisions (fsynced per entry).
+
+    Replaying it on start-up restores the exact choices of an interrupted run: which real photo
+    each segment used (and so the used-images set) or which AI seed it was generated with.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash
+                    self.entries[entry['id']] = entry
+
+    def completed(self, segment):
+        """The recorded decision for `segment`, if it is still valid for the current plan."""
+        entry = self.entries.get(segment['id'])
+        if entry and entry['fingerprint'] == segment_fingerprint(segment):
+            return entry
+        return None
+
+    def used_sources(self, plan):
+        return {
+            entry['source'] for entry in (self.completed(s) for s in plan['segments'])
+            if entry and entry.get('source')
+        }
+
+    def record(self, segment, decision):
+        entry = {"id": segment['id'], "fingerprint": segment_fingerprint(segment), **decision}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries[segment['id']] = entry
+        return entry
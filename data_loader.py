@@ -1,12 +1,31 @@
 import os
 import json
 import re
-from bs4 import BeautifulSoup
-from pypdf import PdfReader
+import shutil
+import hashlib
+import random
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from text_index import article_terms, build_index, save_index, IMAGE_INDEX_FILE
 
 # --- CONFIGURATION ---
 OUTPUT_DATA_FILE = "filtered_data.json"
 OUTPUT_ASSETS_FILE = "available_assets.json"
+CRAWL_STATE_FILE = "crawl_state.json"
+
+# Near-duplicate removal (MinHash + LSH)
+SHINGLE_SIZE = 5          # characters per shingle
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16            # 16 bands x 4 rows
+DEDUP_THRESHOLD = 0.8     # estimated Jaccard needed to merge two facts
+
+# OCR fallback for scanned PDFs (needs `pdf2image` + poppler and `pytesseract` + tesseract)
+OCR_ENABLED = True
+OCR_DPI = 200
+OCR_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+OCR_PAGE_TIMEOUT = 60     # seconds per page
+OCR_LANG = "eng"
+MAX_PDF_PAGES = 3         # only the first pages, to avoid freezing on huge docs
 
 # Broader keywords to ensure we catch everything
 KEYWORDS = [
@@ -17,6 +36,7 @@ KEYWORDS = [
 ]
 
 def extract_text_from_html(file_path):
+    from bs4 import BeautifulSoup
     try:
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             soup = BeautifulSoup(f, 'html.parser')
@@ -25,16 +45,109 @@ def extract_text_from_html(file_path):
         return ""
 
 def extract_text_from_pdf(file_path):
-    text = ""
+    """Returns (text, empty_pages): the text layer plus pages that had none (likely scans)."""
+    from pypdf import PdfReader
+    pages = []
+    empty_pages = []
     try:
         reader = PdfReader(file_path)
         # Limit to first 3 pages to avoid freezing on huge docs
         for i, page in enumerate(reader.pages):
-            if i > 2: break
-            text += page.extract_text() or ""
-        return " ".join(text.split())
+            if i >= MAX_PDF_PAGES: break
+            page_text = " ".join((page.extract_text() or "").split())
+            pages.append(page_text)
+            if not page_text:
+                empty_pages.append(i)
+        return " ".join(p for p in pages if p), empty_pages
+    except:
+        return "", []
+
+# --- OCR FALLBACK ---
+def ocr_available():
+    """Both Python wrappers and both binaries: poppler renders the page, tesseract reads it."""
+    if importlib.util.find_spec("pdf2image") is None or importlib.util.find_spec("pytesseract") is None:
+        return False
+    if shutil.which("pdftoppm") is None:
+        return False
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
     except:
+        return False
+
+def file_hash(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def ocr_page(file_path, page_number, dpi=OCR_DPI):
+    """Renders one page and OCRs it (runs inside the process pool)."""
+    from pdf2image import convert_from_path
+    from pdf2image.exceptions import PDFPopplerTimeoutError
+    import pytesseract
+    try:
+        images = convert_from_path(file_path, dpi=dpi, first_page=page_number + 1, last_page=page_number + 1,
+                                   timeout=OCR_PAGE_TIMEOUT)
+    except PDFPopplerTimeoutError:
+        return ""  # render hit the time limit
+    if not images:
         return ""
+    try:
+        text = pytesseract.image_to_string(images[0], lang=OCR_LANG, timeout=OCR_PAGE_TIMEOUT)
+    except RuntimeError:
+        return ""  # page hit the time limit
+    return " ".join(text.split())
+
+def ocr_scanned_pages(pdf_results, ocr_cache):
+    """OCRs only the empty pages of every PDF, in parallel, caching by file hash + page number.
+
+    Only real results and per-page time-limit hits are cached; pages that raised are retried next crawl.
+
+    `pdf_results` is a list of dicts with `path`, `text` and `empty_pages`; their `text` is extended in place.
+    """
+    jobs = {}
+    for pdf in pdf_results:
+        if not pdf['empty_pages']:
+            continue
+        pdf['hash'] = file_hash(pdf['path'])
+        for page in pdf['empty_pages']:
+            key = f"{pdf['hash']}:{page}"
+            if key not in ocr_cache:
+                jobs[key] = (pdf['path'], page)
+
+    if jobs:
+        print(f"🔎 OCR: {len(jobs)} scanned pages to read ({OCR_WORKERS} workers, {OCR_DPI} dpi)")
+        pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        timed_out = False
+        try:
+            futures = {key: pool.submit(ocr_page, path, page) for key, (path, page) in jobs.items()}
+            for key, future in futures.items():
+                try:
+                    # Pages queue behind the pool; render + OCR each have their own limit inside the page
+                    ocr_cache[key] = future.result(timeout=2 * OCR_PAGE_TIMEOUT * (1 + len(jobs) // OCR_WORKERS))
+                except FuturesTimeoutError:
+                    timed_out = True
+                    print(f"   ⚠️ OCR timed out for {key}; skipping the remaining pages.")
+                    break
+                except Exception as e:
+                    # Not cached: a broken install or crash should not hide the page for good
+                    print(f"   ⚠️ OCR failed for {key}: {e}")
+        finally:
+            # Never wait on a stuck page: drop queued pages and leave running ones to their own timeouts
+            workers = list((getattr(pool, "_processes", None) or {}).values())
+            pool.shutdown(wait=not timed_out, cancel_futures=True)
+            if timed_out:
+                # Interpreter exit would still join a hung worker, so stop them outright
+                for process in workers:
+                    process.terminate()
+
+    for pdf in pdf_results:
+        ocr_text = " ".join(ocr_cache.get(f"{pdf.get('hash')}:{page}", "") for page in pdf['empty_pages'])
+        if ocr_text.strip():
+            pdf['text'] = " ".join(t for t in (pdf['text'], ocr_text.strip()) if t)
 
 def extract_date_from_path(path):
     match = re.search(r'\d{4}-\d{2}-\d{2}', path)
@@ -42,9 +155,105 @@ def extract_date_from_path(path):
         return match.group(0)
     return "Unknown Date"
 
+# --- INCREMENTAL CRAWL STATE ---
+def load_crawl_state():
+    if os.path.exists(CRAWL_STATE_FILE):
+        try:
+            with open(CRAWL_STATE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            pass
+    return {}
+
+def save_crawl_state(state):
+    with open(CRAWL_STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+# --- NEAR-DUPLICATE REMOVAL ---
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1926)  # fixed seed so cached signatures stay valid
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+def shingle(text):
+    text = " ".join(text.lower().split())
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(text):
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+        for s in shingle(text)
+    ]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def estimate_similarity(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+def deduplicate_facts(facts, signature_cache):
+    """Clusters near-identical facts with LSH banding and keeps the earliest-dated one per cluster.
+
+    `signature_cache` maps a content hash to its MinHash signature and is updated in place;
+    entries for content no longer in `facts` are dropped so the crawl state stays bounded.
+    """
+    signatures = []
+    seen = set()
+    for fact in facts:
+        key = hashlib.sha1(fact['content'].encode('utf-8')).hexdigest()
+        if key not in signature_cache:
+            signature_cache[key] = minhash_signature(fact['content'])
+        signatures.append(signature_cache[key])
+        seen.add(key)
+    for key in [k for k in signature_cache if k not in seen]:
+        del signature_cache[key]
+
+    # Union-find over candidate pairs that share at least one LSH band
+    parent = list(range(len(facts)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    checked = set()  # pairs already verified in an earlier band
+    for band in range(LSH_BANDS):
+        buckets = {}
+        for i, sig in enumerate(signatures):
+            buckets.setdefault(tuple(sig[band * rows:(band + 1) * rows]), []).append(i)
+        for members in buckets.values():
+            # Every pair in the bucket is a candidate, not just pairs with its first member
+            for n, a in enumerate(members):
+                for b in members[n + 1:]:
+                    root_a, root_b = find(a), find(b)
+                    if root_a == root_b or (a, b) in checked:
+                        continue
+                    checked.add((a, b))
+                    if estimate_similarity(signatures[a], signatures[b]) >= DEDUP_THRESHOLD:
+                        parent[root_b] = root_a
+
+    clusters = {}
+    for i in range(len(facts)):
+        clusters.setdefault(find(i), []).append(i)
+
+    unique = []
+    for members in clusters.values():
+        # "Unknown Date" sorts after real YYYY-MM-DD dates, so dated copies win
+        keep = min(members, key=lambda i: (facts[i]['date'], i))
+        fact = dict(facts[keep])
+        fact['duplicates'] = len(members) - 1
+        unique.append(fact)
+    return unique
+
 def main():
     relevant_data = []
     visual_assets = []
+    pdf_results = []
+    folder_text = {}  # article folder -> its HTML/PDF text, used to describe images
+    state = load_crawl_state()
     
     print(f"🚀 Scanning deep inside: {os.getcwd()}")
     print("------------------------------------------------")
@@ -65,6 +274,7 @@ def main():
             # 1. HTML Analysis
             if file.endswith("index.html"):
                 content = extract_text_from_html(file_path)
+                folder_text[root] = folder_text.get(root, "") + " " + content
                 if any(k in content.lower() for k in KEYWORDS):
                     relevant_data.append({
                         "type": "text_fact", "date": folder_date, 
@@ -74,13 +284,12 @@ def main():
 
             # 2. PDF Analysis
             elif file.endswith(".pdf"):
-                content = extract_text_from_pdf(file_path)
-                if any(k in content.lower() for k in KEYWORDS):
-                    relevant_data.append({
-                        "type": "text_fact", "date": folder_date,
-                        "source": folder_name, "content": content[:500]
-                    })
-                    print(f"📄 Found PDF Fact: {file}")
+                # Keyword filtering happens after the OCR pass below
+                content, empty_pages = extract_text_from_pdf(file_path)
+                pdf_results.append({
+                    "path": file_path, "file": file, "date": folder_date,
+                    "source": folder_name, "text": content, "empty_pages": empty_pages
+                })
 
             # 3. Image Analysis (JPG/PNG)
             elif file.lower().endswith(('.jpg', '.jpeg', '.png', '.avif')):
@@ -89,10 +298,33 @@ def main():
                     "filename": file, "path": file_path
                 })
 
+    # 2b. OCR fallback for scanned pages, then PDF keyword filtering
+    if OCR_ENABLED and any(pdf['empty_pages'] for pdf in pdf_results):
+        if ocr_available():
+            ocr_scanned_pages(pdf_results, state.setdefault("ocr", {}))
+        else:
+            print("⚠️ Scanned PDFs found but OCR is unavailable (pip install pdf2image pytesseract + poppler/tesseract).")
+
+    for pdf in pdf_results:
+        folder = os.path.dirname(pdf['path'])
+        folder_text[folder] = folder_text.get(folder, "") + " " + pdf['text']
+        if any(k in pdf['text'].lower() for k in KEYWORDS):
+            relevant_data.append({
+                "type": "text_fact", "date": pdf['date'],
+                "source": pdf['source'], "content": pdf['text'][:500]
+            })
+            print(f"📄 Found PDF Fact: {pdf['file']}")
+
     print("------------------------------------------------")
     
     # Save Results
     if relevant_data:
+        # Collapse re-published copies of the same story
+        signature_cache = state.setdefault("minhash", {})
+        before = len(relevant_data)
+        relevant_data = deduplicate_facts(relevant_data, signature_cache)
+        print(f"🧹 Removed {before - len(relevant_data)} near-duplicate facts")
+
         # Sort by date
         relevant_data.sort(key=lambda x: x['date'])
         with open(OUTPUT_DATA_FILE, 'w', encoding='utf-8') as f:
@@ -101,11 +333,25 @@ def main():
     else:
         print("❌ No text data found. Please check if 'news_articles' folder is present.")
 
+    # 4. Describe every image by the article it came from (nearest folder with text)
+    for asset in visual_assets:
+        folder = os.path.dirname(asset['path'])
+        while folder not in folder_text and os.path.dirname(folder) != folder:
+            folder = os.path.dirname(folder)
+        text = folder_text.get(folder, "")
+        asset['keywords'] = [k for k in KEYWORDS if k in text.lower()]
+        asset['terms'] = article_terms(text)
+
     if visual_assets:
         visual_assets.sort(key=lambda x: x['date'])
         with open(OUTPUT_ASSETS_FILE, 'w', encoding='utf-8') as f:
             json.dump(visual_assets, f, indent=4)
         print(f"📸 Indexed {len(visual_assets)} images to {OUTPUT_ASSETS_FILE}")
+        index = build_index(visual_assets)
+        save_index(index, IMAGE_INDEX_FILE)
+        print(f"🗂️ Built term index ({len(index['postings'])} terms) in {IMAGE_INDEX_FILE}")
+
+    save_crawl_state(state)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
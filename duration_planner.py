@@ -0,0 +1,150 @@
+import os
+import re
+import json
+import subprocess
+
+# --- CONFIGURATION ---
+INPUT_FILE = "video_plan.json"
+ASSETS_DIR = "assets"
+MODEL_FILE = "duration_model.json"
+
+TARGET_SECONDS = 120      # "exactly 2 minutes"
+TOLERANCE = 0.10          # accept +/- 10%
+VOICE_RATE = "+0%"        # edge_tts rate string used for synthesis
+
+# Base speaking model for en-US neural voices (seconds); refined by calibration
+WORDS_PER_SECOND = 2.6
+COMMA_PAUSE = 0.25
+SENTENCE_PAUSE = 0.55
+LEAD_SILENCE = 0.3
+MAX_HISTORY = 500
+
+def load_model():
+    model = {"scale": 1.0, "history": []}
+    if os.path.exists(MODEL_FILE):
+        try:
+            with open(MODEL_FILE, 'r') as f:
+                model.update(json.load(f))
+        except:
+            pass
+    return model
+
+def save_model(model):
+    model["history"] = model["history"][-MAX_HISTORY:]
+    with open(MODEL_FILE, 'w') as f:
+        json.dump(model, f, indent=4)
+
+def rate_factor(rate):
+    """'+10%' -> 1.1 (speech is 10% faster)."""
+    match = re.fullmatch(r'([+-]\d+)%', rate.strip())
+    return 1.0 + int(match.group(1)) / 100 if match else 1.0
+
+def raw_estimate(text, rate=VOICE_RATE):
+    words = len(text.split())
+    commas = len(re.findall(r'[,;:—-]\s', text))
+    sentences = len(re.findall(r'[.!?]+(\s|$)', text))
+    speech = words / (WORDS_PER_SECOND * rate_factor(rate))
+    return LEAD_SILENCE + speech + commas * COMMA_PAUSE + sentences * SENTENCE_PAUSE
+
+def estimate_duration(text, model=None, rate=VOICE_RATE):
+    """Predicted spoken duration of `text` in seconds."""
+    model = model or load_model()
+    return raw_estimate(text, rate) * model["scale"]
+
+def probe_duration(path):
+    """Actual audio length via ffprobe (the same ffmpeg toolchain MoviePy uses)."""
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        return float(out.strip())
+    except:
+        return None
+
+def record_actual(model, text, actual, rate=VOICE_RATE):
+    """Stores a predicted/actual pair and refits the scale factor on all history."""
+    model["history"].append({
+        "words": len(text.split()),
+        "raw": round(raw_estimate(text, rate), 3),
+        "predicted": round(raw_estimate(text, rate) * model["scale"], 3),
+        "actual": round(actual, 3),
+    })
+    total_raw = sum(h["raw"] for h in model["history"])
+    if total_raw > 0:
+        model["scale"] = sum(h["actual"] for h in model["history"]) / total_raw
+
+def calibrate(plan_file=INPUT_FILE, assets_dir=ASSETS_DIR, rate=VOICE_RATE):
+    """Fits the model against edge_tts outputs already in `assets_dir`."""
+    if not os.path.exists(plan_file):
+        print(f"❌ {plan_file} missing, nothing to calibrate against.")
+        return None
+    with open(plan_file, 'r') as f:
+        plan = json.load(f)
+
+    model = load_model()
+    seen = {(h["words"], h["actual"]) for h in model["history"]}
+    for segment in plan['segments']:
+        audio_path = os.path.join(assets_dir, f"audio_{segment['id']}.mp3")
+        if not os.path.exists(audio_path):
+            continue
+        actual = probe_duration(audio_path)
+        if actual is None or (len(segment['narration'].split()), round(actual, 3)) in seen:
+            continue
+        predicted = estimate_duration(segment['narration'], model, rate)
+        record_actual(model, segment['narration'], actual, rate)
+        print(f"   Segment {segment['id']}: predicted {predicted:.1f}s, actual {actual:.1f}s")
+
+    save_model(model)
+    print(f"📏 Duration model scale: {model['scale']:.3f} ({len(model['history'])} samples)")
+    return model
+
+def trim_narration(text):
+    """Drops the last sentence, keeping at least one."""
+    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    if len(sentences) <= 1:
+        return text
+    return " ".join(sentences[:-1])
+
+def plan_durations(plan, target=TARGET_SECONDS, tolerance=TOLERANCE, trim=False, rate=VOICE_RATE):
+    """Predicts every segment's duration and flags (or trims) a plan that misses the target.
+
+    Returns (total_seconds, within_target). With trim=True the longest segments lose their
+    final sentence until the plan fits, before any TTS or diffusion time is spent.
+    """
+    model = load_model()
+    segments = plan['segments']
+
+    def predicted():
+        return [estimate_duration(s['narration'], model, rate) for s in segments]
+
+    durations = predicted()
+    total = sum(durations)
+    limit = target * (1 + tolerance)
+
+    while trim and total > limit:
+        order = sorted(range(len(segments)), key=lambda i: durations[i], reverse=True)
+        for i in order:
+            shorter = trim_narration(segments[i]['narration'])
+            if shorter != segments[i]['narration']:
+                print(f"   ✂️ Trimmed segment {segments[i]['id']}")
+                segments[i]['narration'] = shorter
+                break
+        else:
+            break  # nothing left to trim
+        durations = predicted()
+        total = sum(durations)
+
+    for segment, seconds in zip(segments, durations):
+        segment['predicted_duration'] = round(seconds, 2)
+
+    within = target * (1 - tolerance) <= total <= limit
+    status = "✅" if within else "⚠️"
+    print(f"{status} Predicted narration length: {total:.1f}s (target {target}s ±{int(tolerance * 100)}%)")
+    return total, within
+
+if __name__ == "__main__":
+    model = calibrate()
+    if model and os.path.exists(INPUT_FILE):
+        with open(INPUT_FILE, 'r') as f:
+            plan_durations(json.load(f))
@@ -1,60 +1,198 @@
 import json
 import os
 import sys
-
-# Try importing MoviePy
-try:
-    from moviepy.editor import AudioFileClip, ImageClip, concatenate_videoclips
-except ImportError:
-    try:
-        from moviepy import AudioFileClip, ImageClip, concatenate_videoclips
-    except ImportError:
-        print("❌ Error: MoviePy is not installed. Run: pip install \"moviepy<2.0\"")
-        sys.exit(1)
+import time
+import hashlib
+from subtitles import captions_path, load_timings, group_captions, render_caption, write_srt
+from output_profiles import PROFILES, render_profiles
 
 # --- CONFIGURATION ---
 INPUT_FILE = "video_plan.json"
 ASSETS_DIR = "assets"
 OUTPUT_VIDEO = "final_submission.mp4"
+BURN_IN_CAPTIONS = True
+
+# Plans longer than this use the streaming timeline engine (bounded memory and open files)
+LONG_TIMELINE_SEGMENTS = 60
+
+# Draft / preview mode
+DRAFT_OUTPUT = "draft_preview.mp4"
+DRAFT_REPORT = "draft_report.json"
+DRAFT_HEIGHT = 360
+DRAFT_FPS = 8
+DRAFT_PRESET = "ultrafast"
+PROXY_DIR = os.path.join("cache", "proxies")
+CAPTION_MARGIN_RATIO = 0.08   # caption distance from the bottom edge
+
+def load_moviepy():
+    """Imports MoviePy on first use; it is slow to import and not needed for --help or streaming."""
+    global AudioFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips
+    try:
+        from moviepy.editor import AudioFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips
+    except ImportError:
+        try:
+            from moviepy import AudioFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips
+        except ImportError:
+            print("❌ Error: MoviePy is not installed. Run: pip install \"moviepy<2.0\"")
+            sys.exit(1)
+
+def add_captions(video_clip, captions):
+    """Overlays pre-rasterized captions; each overlay is only composited while visible."""
+    frame_width, frame_height = video_clip.size
+    overlays = []
+    for caption in captions:
+        rgba = render_caption(caption['text'], frame_width, frame_height)
+        y = frame_height - rgba.shape[0] - int(frame_height * CAPTION_MARGIN_RATIO)
+        overlays.append(
+            ImageClip(rgba, transparent=True)
+            .set_start(caption['start'])
+            .set_duration(max(0.05, caption['end'] - caption['start']))
+            .set_position(("center", y))
+        )
+    if not overlays:
+        return video_clip
+    return CompositeVideoClip([video_clip] + overlays).set_duration(video_clip.duration)
+
+def proxy_image(image_path, height=DRAFT_HEIGHT):
+    """Low-resolution copy of a still, cached by source path, size and mtime."""
+    from PIL import Image
+    stat = os.stat(image_path)
+    key = hashlib.sha1(f"{os.path.abspath(image_path)}|{stat.st_size}|{stat.st_mtime_ns}|{height}".encode()).hexdigest()[:16]
+    proxy_path = os.path.join(PROXY_DIR, f"{key}.jpg")
+    if not os.path.exists(proxy_path):
+        os.makedirs(PROXY_DIR, exist_ok=True)
+        with Image.open(image_path) as image:
+            image = image.convert("RGB")
+            width = max(2, int(image.width * height / image.height) // 2 * 2)
+            image.resize((width, height), Image.BILINEAR).save(proxy_path, quality=80)
+    return proxy_path
+
+def parse_segment_range(text):
+    """'3-5' -> (3, 5); '4' -> (4, 4)"""
+    start, _, end = text.partition("-")
+    return int(start), int(end or start)
+
+def ranged_output(output_video, segment_range):
+    """final_submission.mp4 + (3, 5) -> final_submission_seg3-5.mp4, so a partial cut never replaces the full one."""
+    stem, ext = os.path.splitext(output_video)
+    return f"{stem}_seg{segment_range[0]}-{segment_range[1]}{ext or '.mp4'}"
 
-def create_video():
-    if not os.path.exists(ASSETS_DIR):
+def create_video_streaming(data, assets_dir, output_video, segment_range=None):
+    """Long-timeline path: segments are opened lazily in playback order and released once encoded."""
+    from timeline import timeline_entries, render_timeline
+    segments = [s for s in data['segments']
+                if not segment_range or segment_range[0] <= s['id'] <= segment_range[1]]
+    entries = timeline_entries({"segments": segments}, assets_dir)
+    if not entries:
+        print("No clips were created. Check your assets folder.")
+        return
+    print(f"Streaming {len(entries)} segments to {output_video}...")
+    srt_captions = render_timeline(entries, output_video, fps=24, burn_in_captions=BURN_IN_CAPTIONS)
+    if srt_captions:
+        subtitles_path = os.path.splitext(output_video)[0] + ".srt"
+        write_srt(srt_captions, subtitles_path)
+        print(f"Subtitles written to {subtitles_path}")
+    print("Done! Video is ready.")
+
+def create_video(plan_file=INPUT_FILE, assets_dir=ASSETS_DIR, output_video=OUTPUT_VIDEO, profiles=None,
+                 draft=False, segment_range=None, streaming=None, tracks=None):
+    """Renders the plan to `output_video`; with `profiles` (names from output_profiles.PROFILES)
+    one assembly pass is fanned out to one encoder per profile instead.
+
+    draft=True renders cached low-res proxies at DRAFT_FPS with a fast preset to DRAFT_OUTPUT
+    and writes a timing report; `segment_range` (first_id, last_id) limits either mode, and
+    outside draft mode the partial render goes to a range-suffixed file (see ranged_output).
+    streaming=None picks the streaming engine automatically for plans over LONG_TIMELINE_SEGMENTS.
+    `tracks` (see narration_tracks.NARRATION_TRACKS) encodes the video once and muxes one
+    language-tagged audio stream per voice, each padded to the longest take of every segment.
+    """
+    timings = {}
+    started = time.perf_counter()
+    if draft:
+        output_video = DRAFT_OUTPUT
+        profiles = None
+    elif segment_range:
+        output_video = ranged_output(output_video, segment_range)
+    if tracks:
+        profiles = None
+        streaming = False
+    if not os.path.exists(assets_dir):
         print("Error: Assets folder not found. You must run gen_assets.py first.")
         return
 
     # 1. Load the Script Plan
-    with open(INPUT_FILE, 'r') as f:
+    with open(plan_file, 'r') as f:
         data = json.load(f)
 
+    if streaming is None:
+        streaming = not draft and not profiles and len(data['segments']) > LONG_TIMELINE_SEGMENTS
+    if streaming:
+        return create_video_streaming(data, assets_dir, output_video, segment_range)
+
+    durations = {}
+    if tracks:
+        from narration_tracks import segment_durations
+        durations = segment_durations(data, assets_dir, tracks)
+
+    load_moviepy()
+    included_ids = []
     clips = []
+    spans = []
+    srt_captions = []
+    timeline_offset = 0.0
     
     print(" assembling video segments...")
 
     # 2. Loop through every segment to create clips
     for segment in data['segments']:
         seg_id = segment['id']
+        if segment_range and not (segment_range[0] <= seg_id <= segment_range[1]):
+            continue
         
         # Define file paths
-        audio_path = os.path.join(ASSETS_DIR, f"audio_{seg_id}.mp3")
-        image_path = os.path.join(ASSETS_DIR, f"image_{seg_id}.jpg")
+        audio_path = os.path.join(assets_dir, f"audio_{seg_id}.mp3")
+        image_path = os.path.join(assets_dir, f"image_{seg_id}.jpg")
 
         # Check if files exist
         if not os.path.exists(audio_path) or not os.path.exists(image_path):
             print(f"Skipping Segment {seg_id}: Missing audio or image files.")
             continue
+        if tracks and seg_id not in durations:
+            # No take of this segment could be probed, so there is no shared length to pad to
+            print(f"Skipping Segment {seg_id}: Missing audio or image files.")
+            continue
 
         # 3. Create the Clip
-        # Load Audio
-        audio_clip = AudioFileClip(audio_path)
+        # Load Audio (with several tracks the segment lasts as long as its longest take)
+        if tracks:
+            audio_clip = None
+            duration = durations[seg_id]
+        else:
+            audio_clip = AudioFileClip(audio_path)
+            duration = audio_clip.duration
         
         # Load Image and set it to last exactly as long as the audio
-        video_clip = ImageClip(image_path).set_duration(audio_clip.duration)
+        if draft:
+            image_path = proxy_image(image_path)
+        video_clip = ImageClip(image_path).set_duration(duration)
         
+        # Captions from the TTS word-boundary timings
+        captions = group_captions(load_timings(captions_path(audio_path), segment['narration']))
+        if BURN_IN_CAPTIONS and not profiles:  # profile encoders burn them in after cropping
+            video_clip = add_captions(video_clip, captions)
+        srt_captions.extend(
+            {**c, "start": c['start'] + timeline_offset, "end": c['end'] + timeline_offset} for c in captions
+        )
+        spans.append((timeline_offset, timeline_offset + duration))
+        timeline_offset += duration
+
         # Combine them
-        video_clip = video_clip.set_audio(audio_clip)
+        if audio_clip:
+            video_clip = video_clip.set_audio(audio_clip)
         
         # Add to list
         clips.append(video_clip)
+        included_ids.append(seg_id)
 
     if not clips:
         print("No clips were created. Check your assets folder.")
@@ -62,12 +200,71 @@ def create_video():
 
     # 4. Concatenate (Stitch) all clips together
     final_video = concatenate_videoclips(clips, method="compose")
+    timings['assemble_seconds'] = time.perf_counter() - started
 
     # 5. Export final video
-    print(f"Rendering final video to {OUTPUT_VIDEO}...")
-    # fps=24 is standard for film/video
-    final_video.write_videofile(OUTPUT_VIDEO, fps=24, codec="libx264", audio_codec="aac")
+    render_started = time.perf_counter()
+    if draft:
+        print(f"Rendering draft preview to {output_video} ({DRAFT_HEIGHT}p, {DRAFT_FPS} fps)...")
+        final_video.write_videofile(output_video, fps=DRAFT_FPS, codec="libx264", audio_codec="aac",
+                                    preset=DRAFT_PRESET, threads=os.cpu_count(), logger=None)
+    elif tracks:
+        from narration_tracks import mux_tracks
+        video_only = os.path.splitext(output_video)[0] + "_video.mp4"
+        print(f"Rendering video stream once, then muxing {len(tracks)} narration tracks into {output_video}...")
+        final_video.write_videofile(video_only, fps=24, codec="libx264", audio=False)
+        mux_tracks(video_only, included_ids, durations, output_video, assets_dir, tracks)
+        os.remove(video_only)
+    elif profiles:
+        print(f"Rendering {len(profiles)} formats from one pass ({', '.join(profiles)})...")
+        outputs = render_profiles(final_video, output_video, profiles, spans, fps=24,
+                                  captions=srt_captions if BURN_IN_CAPTIONS else None)
+    else:
+        print(f"Rendering final video to {output_video}...")
+        # fps=24 is standard for film/video
+        final_video.write_videofile(output_video, fps=24, codec="libx264", audio_codec="aac")
+    if srt_captions:
+        # One sidecar per file actually written, named to match it
+        for video_path in (outputs.values() if profiles else [output_video]):
+            subtitles_path = os.path.splitext(video_path)[0] + ".srt"
+            write_srt(srt_captions, subtitles_path)
+            print(f"Subtitles written to {subtitles_path}")
+    timings['render_seconds'] = time.perf_counter() - render_started
+
+    if draft:
+        report = {
+            "segments": len(clips),
+            "segment_range": segment_range,
+            "timeline_seconds": round(final_video.duration, 2),
+            "assemble_seconds": round(timings['assemble_seconds'], 2),
+            "render_seconds": round(timings['render_seconds'], 2),
+            "total_seconds": round(time.perf_counter() - started, 2),
+        }
+        with open(DRAFT_REPORT, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"⏱️ Draft: {report['segments']} segments, {report['timeline_seconds']}s of video "
+              f"in {report['total_seconds']}s (assemble {report['assemble_seconds']}s, "
+              f"render {report['render_seconds']}s)")
     print("Done! Video is ready.")
 
 if __name__ == "__main__":
-    create_video()
\ No newline at end of file
+    # python editor.py --profiles 1080p,720p,vertical
+    selected = None
+    if "--profiles" in sys.argv:
+        selected = sys.argv[sys.argv.index("--profiles") + 1].split(",")
+        unknown = [name for name in selected if name not in PROFILES]
+        if unknown:
+            print(f"❌ Unknown profiles: {', '.join(unknown)} (choose from {', '.join(PROFILES)})")
+            sys.exit(1)
+    # python editor.py --draft [--segments 3-5]
+    segment_range = None
+    if "--segments" in sys.argv:
+        segment_range = parse_segment_range(sys.argv[sys.argv.index("--segments") + 1])
+    streaming = True if "--stream" in sys.argv else None
+    # python editor.py --tracks  (one MP4 with every voice in narration_tracks.NARRATION_TRACKS)
+    tracks = None
+    if "--tracks" in sys.argv:
+        from narration_tracks import NARRATION_TRACKS
+        tracks = NARRATION_TRACKS
+    create_video(profiles=selected, draft="--draft" in sys.argv, segment_range=segment_range,
+                 streaming=streaming, tracks=tracks)
\ No newline at end of file
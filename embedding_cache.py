@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import torch
+
+# --- CONFIGURATION ---
+CACHE_DIR = os.path.join("cache", "prompt_embeddings")
+MAX_MEMORY_ENTRIES = 64
+ENCODE_COST_FILE = "encode_cost.json"   # measured seconds per text-encoder call, per model
+
+class PromptEmbeddingCache:
+    """Caches CLIP text embeddings per (model, prompt).
+
+    Entries live in an in-memory LRU and are persisted as float16 .npy files, so
+    re-runs skip the text encoder for prompts that have not changed.
+    """
+
+    def __init__(self, pipe, model_id, cache_dir=CACHE_DIR, max_entries=MAX_MEMORY_ENTRIES):
+        self.pipe = pipe
+        self.model_id = model_id
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cost_path = os.path.join(cache_dir, ENCODE_COST_FILE)
+        self.encode_cost = self._load_cost()
+
+    def _load_cost(self):
+        """{"seconds": mean encode time, "samples": n} from earlier runs, so fully cached runs can report savings."""
+        try:
+            with open(self.cost_path, 'r') as f:
+                return json.load(f).get(self.model_id, {"seconds": 0.0, "samples": 0})
+        except:
+            return {"seconds": 0.0, "samples": 0}
+
+    def _save_cost(self, seconds):
+        samples = self.encode_cost["samples"] + 1
+        self.encode_cost = {
+            "seconds": self.encode_cost["seconds"] + (seconds - self.encode_cost["seconds"]) / samples,
+            "samples": samples,
+        }
+        try:
+            with open(self.cost_path, 'r') as f:
+                costs = json.load(f)
+        except:
+            costs = {}
+        costs[self.model_id] = self.encode_cost
+        tmp_path = self.cost_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(costs, f, indent=2)
+        os.replace(tmp_path, self.cost_path)
+
+    def _key(self, prompt):
+        return hashlib.sha1(f"{self.model_id}\n{prompt}".encode('utf-8')).hexdigest()
+
+    def _to_pipe(self, array):
+        return torch.from_numpy(array).to(device=self.pipe.device, dtype=self.pipe.text_encoder.dtype)
+
+    def _remember(self, key, embeds):
+        self.memory[key] = embeds
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _encode(self, prompt):
+        start = time.perf_counter()
+        with torch.no_grad():
+            embeds, _ = self.pipe.encode_prompt(
+                prompt, self.pipe.device, num_images_per_prompt=1, do_classifier_free_guidance=False
+            )
+        elapsed = time.perf_counter() - start
+        self.encode_seconds += elapsed
+        self._save_cost(elapsed)
+        return embeds
+
+    def get(self, prompt):
+        """Returns the text embedding for `prompt`, encoding it only on a cache miss."""
+        key = self._key(prompt)
+        if key in self.memory:
+            self.hits += 1
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        path = os.path.join(self.cache_dir, f"{key}.npy")
+        if os.path.exists(path):
+            try:
+                embeds = self._to_pipe(np.load(path))
+                self.hits += 1
+                self._remember(key, embeds)
+                return embeds
+            except:
+                pass  # corrupt entry, re-encode below
+
+        self.misses += 1
+        embeds = self._encode(prompt)
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, embeds.detach().to("cpu", torch.float16).numpy())
+        os.replace(tmp_path, path)
+        self._remember(key, embeds)
+        return embeds
+
+    def pipeline_kwargs(self, prompt, negative_prompt=""):
+        """Embedding kwargs to pass to a diffusers pipeline in place of prompt/negative_prompt."""
+        return {
+            "prompt_embeds": self.get(prompt),
+            "negative_prompt_embeds": self.get(negative_prompt),
+        }
+
+    def report(self):
+        lookups = self.hits + self.misses
+        if not lookups:
+            return
+        # Prefer this run's timing; a fully cached run falls back to the persisted measurement
+        avg_encode = self.encode_seconds / self.misses if self.misses else self.encode_cost["seconds"]
+        print(f"🧠 Prompt cache: {self.hits}/{lookups} hits ({100 * self.hits / lookups:.0f}%), "
+              f"~{self.hits * avg_encode:.2f}s of text encoding saved")
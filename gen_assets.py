@@ -1,9 +1,9 @@
 import json
 import os
-import requests
 import asyncio
 import edge_tts
 from dotenv import load_dotenv
+from hf_client import ImageAPIClient
 
 # --- CONFIGURATION ---
 load_dotenv()
@@ -29,30 +29,30 @@ async def generate_audio(text, filename):
     except Exception as e:
         print(f"   ❌ TTS Error: {e}")
 
-def generate_image(prompt, filename):
+async def generate_image(client, prompt, filename):
     print(f"🎨 Generating Image: {filename}...")
-    headers = {"Authorization": f"Bearer {HF_TOKEN}"}
     
     # Enforce Red/Coal Theme in every image
     styled_prompt = f"{prompt}, (red theme:1.2), (coal dust atmosphere:0.8), cinematic lighting, 8k resolution, photorealistic"
     
-    # Retry logic (3 attempts)
-    for i in range(3):
-        try:
-            response = requests.post(HF_API_URL, headers=headers, json={"inputs": styled_prompt})
-            if response.status_code == 200:
-                with open(filename, "wb") as f:
-                    f.write(response.content)
-                print("   ✅ Image saved.")
-                return True
-            else:
-                print(f"   ⚠️ API Error (Attempt {i+1}): {response.text}")
-                import time
-                time.sleep(5)
-        except Exception as e:
-            print(f"   ❌ Connection Error: {e}")
+    if await client.generate(styled_prompt, filename):
+        print("   ✅ Image saved.")
+        return True
     return False
 
+async def generate_segment(client, segment):
+    seg_id = segment['id']
+
+    # Define filenames
+    audio_path = os.path.join(OUTPUT_DIR, f"audio_{seg_id}.mp3")
+    image_path = os.path.join(OUTPUT_DIR, f"image_{seg_id}.jpg")
+
+    # Audio and image requests overlap; the client caps concurrent image calls
+    await asyncio.gather(
+        generate_audio(segment['narration'], audio_path),
+        generate_image(client, segment['image_prompt'], image_path),
+    )
+
 async def main():
     # 1. Check for the plan
     if not os.path.exists(INPUT_FILE):
@@ -68,21 +68,10 @@ async def main():
 
     print(f"🚀 Generating assets for {len(data['segments'])} segments...")
 
-    # 3. Execution Loop
-    for segment in data['segments']:
-        seg_id = segment['id']
-        narration = segment['narration']
-        image_prompt = segment['image_prompt']
-
-        # Define filenames
-        audio_path = os.path.join(OUTPUT_DIR, f"audio_{seg_id}.mp3")
-        image_path = os.path.join(OUTPUT_DIR, f"image_{seg_id}.jpg")
-
-        # Generate Audio (Async)
-        await generate_audio(narration, audio_path)
-        
-        # Generate Image (Sync)
-        generate_image(image_prompt, image_path)
+    # 3. Execution (all segments in flight, one pooled HTTP client)
+    with ImageAPIClient(HF_API_URL, HF_TOKEN) as client:
+        await asyncio.gather(*(generate_segment(client, segment) for segment in data['segments']))
+        print(f"📊 Image API: {client.stats['requests']} requests, {client.stats['retries']} retries")
 
     print(f"🎉 Success! Check the '{OUTPUT_DIR}' folder.")
 
@@ -1,9 +1,8 @@
 import json
 import os
 import asyncio
-import edge_tts
-import torch
-from diffusers import StableDiffusionPipeline
+from subtitles import synthesize_with_timings, captions_path
+from gen_worker import generate
 
 # --- CONFIGURATION ---
 INPUT_FILE = "video_plan.json"
@@ -11,35 +10,16 @@ OUTPUT_DIR = "assets"
 VOICE = "en-US-ChristopherNeural"
 
 # --- LOCAL GPU SETUP ---
-def load_local_model():
-    print("⏳ Loading AI Model to GPU (This happens once)...")
-    try:
-        # We use v1-5 because it is fast and reliable
-        model_id = "runwayml/stable-diffusion-v1-5"
-        pipe = StableDiffusionPipeline.from_pretrained(
-            model_id, 
-            torch_dtype=torch.float16, 
-            variant="fp16"
-        )
-        pipe = pipe.to("cuda")
-        print("✅ Model loaded on NVIDIA GPU!")
-        return pipe
-    except Exception as e:
-        print(f"❌ GPU Error: {e}")
-        print("⚠️ Falling back to CPU (Slow but works)")
-        pipe = StableDiffusionPipeline.from_pretrained(model_id)
-        return pipe
-
-# Initialize model globally
-pipe = load_local_model()
+# The model lives in gen_worker: start `python gen_worker.py` once to keep it warm
+# between runs, otherwise it is loaded in-process on the first image.
 
 async def generate_audio(text, filename):
-    if os.path.exists(filename):
+    timings = captions_path(filename)
+    if os.path.exists(filename) and os.path.exists(timings):
         print(f"   (Audio exists: {filename})")
         return
     print(f"🎙️ Generating Audio: {filename}...")
-    communicate = edge_tts.Communicate(text, VOICE)
-    await communicate.save(filename)
+    await synthesize_with_timings(text, VOICE, filename, timings)
 
 def generate_image(prompt, filename):
     if os.path.exists(filename) and os.path.getsize(filename) > 1000:
@@ -51,8 +31,7 @@ def generate_image(prompt, filename):
     final_prompt = f"{prompt}, (red theme:1.2), historical, cinematic lighting, 8k"
     
     # Generate on GPU (No Internet needed for this part)
-    image = pipe(final_prompt).images[0]
-    image.save(filename)
+    generate("txt2img", {"prompt": final_prompt, "filename": filename})
     print("   ✅ Image saved.")
 
 async def main():
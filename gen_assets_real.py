@@ -2,9 +2,11 @@ import json
 import os
 import shutil
 import asyncio
-import edge_tts
-import torch
-from diffusers import StableDiffusionPipeline
+from subtitles import synthesize_with_timings, captions_path
+from gen_worker import generate, report as report_generation
+from duration_planner import plan_durations, calibrate
+from text_index import load_index, query_index
+from checkpoint import atomic_write, segment_seed, GenerationJournal, JOURNAL_FILE
 
 # --- CONFIGURATION ---
 INPUT_PLAN = "video_plan.json"
@@ -12,48 +14,70 @@ INPUT_ASSETS = "available_assets.json"
 OUTPUT_DIR = "assets"
 VOICE = "en-US-ChristopherNeural"
 
-# --- 1. SETUP AI MODEL (Local GPU) ---
-def load_model():
-    print("⏳ Loading AI Model for Centenary generation...")
-    try:
-        pipe = StableDiffusionPipeline.from_pretrained(
-            "runwayml/stable-diffusion-v1-5", 
-            torch_dtype=torch.float16, 
-            variant="fp16"
-        )
-        pipe = pipe.to("cuda")
-        print("✅ GPU Model Loaded! (Will be used for 2026/Missing photos)")
-        return pipe
-    except:
-        print("⚠️ GPU Error. Falling back to CPU (Slower).")
-        return StableDiffusionPipeline.from_pretrained("runwayml/stable-diffusion-v1-5")
-
-# Initialize Model
-pipe = load_model()
-
-async def generate_audio(text, filename):
-    if os.path.exists(filename) and os.path.getsize(filename) > 0: return
+# Restyle matched real photos (img2img) instead of copying them or generating from noise
+STYLIZE_REAL_PHOTOS = True
+STYLIZE_STRENGTH = 0.35   # img2img runs only ~35% of the denoising schedule
+STYLIZE_STEPS = 50        # full schedule length; effective steps = STYLIZE_STEPS * STYLIZE_STRENGTH
+
+# Images are generated by gen_worker (a warm worker process if running, else in-process)
+
+async def generate_audio(text, filename, force=False):
+    """Synthesizes narration + word timings; existing takes are kept unless `force` (narration changed)."""
+    timings = captions_path(filename)
+    if not force and os.path.exists(filename) and os.path.getsize(filename) > 0 and os.path.exists(timings): return
     print(f"🎙️ Generating Audio: {filename}...")
-    communicate = edge_tts.Communicate(text, VOICE)
-    await communicate.save(filename)
+    await synthesize_with_timings(text, VOICE, filename, timings)
 
-def generate_ai_image(prompt, filename, style="cinematic"):
-    print(f"🎨 AI Generating: {filename} ({style})...")
-    
+def style_prompt(prompt, style):
     # Custom styling based on era
     if "red" in style or "fire" in style:
-        final_prompt = f"{prompt}, (glowing red theme:1.4), fireworks, celebration, cinematic lighting, 8k, night time"
+        return f"{prompt}, (glowing red theme:1.4), fireworks, celebration, cinematic lighting, 8k, night time"
     elif "vintage" in style:
-        final_prompt = f"{prompt}, sepia tone, 1926 vintage photograph, grainy, historical"
+        return f"{prompt}, sepia tone, 1926 vintage photograph, grainy, historical"
     else:
-        final_prompt = f"{prompt}, photorealistic, 8k, highly detailed"
+        return f"{prompt}, photorealistic, 8k, highly detailed"
 
-    image = pipe(final_prompt).images[0]
-    image.save(filename)
+def generate_ai_image(prompt, filename, style="cinematic", seed=None):
+    print(f"🎨 AI Generating: {filename} ({style})...")
+
+    generate("txt2img", {"prompt": style_prompt(prompt, style), "filename": filename, "seed": seed})
     print("   ✅ AI Image saved.")
 
-def get_real_image(target_year, assets, used_images):
-    """Finds best unused real image for the year."""
+def stylize_real_image(src_path, prompt, filename, style, seed=None):
+    """Restyles a real photo with a short img2img pass so it stays anchored to campus imagery."""
+    print(f"🖌️ Stylizing Real Photo: {filename} ({style})...")
+    generate("img2img", {
+        "src": src_path,
+        "prompt": style_prompt(prompt, style),
+        "filename": filename,
+        "strength": STYLIZE_STRENGTH,
+        "steps": STYLIZE_STEPS,
+        "seed": seed,
+    })
+    print("   ✅ Stylized Image saved.")
+
+def target_year_for(text):
+    """Era a segment's narration is about (2026 for centenary/future segments)."""
+    text = text.lower()
+    if "2026" in text or "centenary" in text or "celebration" in text or "future" in text:
+        return 2026
+    for year in (1926, 1957, 1976, 2016):
+        if str(year) in text:
+            return year
+    return 2016 # Default
+
+def era_style(target_year):
+    if target_year >= 2026:
+        return "red fire celebration"
+    return "vintage" if target_year < 1980 else "photorealistic"
+
+def get_real_image(target_year, assets, used_images, narration=None, index=None, assets_by_path=None):
+    """Finds best unused real image for the year, preferring photos whose article matches the narration."""
+    if narration and index:
+        match = query_index(index, assets_by_path, narration, target_year, used_images)
+        if match:
+            return match
+
     best_match = None
     min_diff = float('inf')
 
@@ -73,62 +97,103 @@ def get_real_image(target_year, assets, used_images):
 
     return best_match
 
+def decide_image(segment, real_images, used_images, image_index, real_by_path):
+    """Picks how a segment's image is made: {"kind": stylize|real|ai, "source", "style", "seed"}."""
+    text = segment['narration'].lower()
+    target_year = target_year_for(text)
+    style = era_style(target_year)
+    seed = segment_seed(segment)
+
+    # 1. Is it the CENTENARY (2026)? -> FORCE AI (Red Theme), optionally anchored on a real photo
+    if target_year == 2026 and not STYLIZE_REAL_PHOTOS:
+        return {"kind": "ai", "source": None, "style": style, "seed": seed}
+
+    # 2. Otherwise try Real, fallback to AI in the era's look
+    match = get_real_image(target_year, real_images, used_images, text, image_index, real_by_path)
+    if match and STYLIZE_REAL_PHOTOS:
+        return {"kind": "stylize", "source": match['path'], "date": match['date'], "style": style, "seed": seed}
+    if match:
+        return {"kind": "real", "source": match['path'], "date": match['date'], "style": None, "seed": None}
+    return {"kind": "ai", "source": None, "style": style, "seed": seed}
+
+def render_image(segment, decision, dst_path):
+    """Carries out a decision (falling back to AI on failure); returns the decision actually used."""
+    seg_id = segment['id']
+    image_prompt = segment['image_prompt']
+    seed = decision['seed'] if decision['seed'] is not None else segment_seed(segment)
+
+    if decision['kind'] == "stylize":
+        try:
+            stylize_real_image(decision['source'], image_prompt, dst_path, decision['style'], seed=seed)
+            print(f"🔹 Segment {seg_id}: Restyled Real Photo ({decision['date']}, {decision['style']})")
+            return decision
+        except Exception as e:
+            print(f"   ⚠️ Stylize failed ({e}), generating from scratch.")
+            decision = {"kind": "ai", "source": None, "style": decision['style'], "seed": seed}
+    elif decision['kind'] == "real":
+        try:
+            with atomic_write(dst_path) as tmp_path:
+                shutil.copy(decision['source'], tmp_path)
+            print(f"🔹 Segment {seg_id}: Used Real Photo ({decision['date']})")
+            return decision
+        except:
+            decision = {"kind": "ai", "source": None, "style": "photorealistic", "seed": seed}
+    else:
+        print(f"🔹 Segment {seg_id}: No usable real photo. Using AI ({decision['style']}).")
+
+    generate_ai_image(image_prompt, dst_path, style=decision['style'], seed=decision['seed'])
+    return decision
+
+def load_real_assets():
+    """(real_images, real_by_path, image_index) for decide_image."""
+    real_images = []
+    if os.path.exists(INPUT_ASSETS):
+        with open(INPUT_ASSETS, 'r') as f:
+            real_images = [x for x in json.load(f) if x['type'] == 'image']
+    return real_images, {x['path']: x for x in real_images}, load_index()
+
 async def main():
     if not os.path.exists(INPUT_PLAN): return
     if not os.path.exists(OUTPUT_DIR): os.makedirs(OUTPUT_DIR)
     
     with open(INPUT_PLAN, 'r') as f: plan = json.load(f)
     
-    # Load Real Assets
-    real_images = []
-    if os.path.exists(INPUT_ASSETS):
-        with open(INPUT_ASSETS, 'r') as f:
-            real_images = [x for x in json.load(f) if x['type'] == 'image']
+    real_images, real_by_path, image_index = load_real_assets()
+
+    # Replay the journal: finished segments are skipped and keep their photos reserved
+    journal = GenerationJournal(os.path.join(OUTPUT_DIR, JOURNAL_FILE))
+    used_images = journal.used_sources(plan)
 
-    used_images = set()
+    # Flag an over/under-length script before any expensive generation
+    plan_durations(plan)
 
     print(f"🚀 Starting Hybrid Generation...")
 
     for i, segment in enumerate(plan['segments']):
         seg_id = segment['id']
-        text = segment['narration'].lower()
-        image_prompt = segment['image_prompt']
-        
-        # Audio
-        await generate_audio(segment['narration'], os.path.join(OUTPUT_DIR, f"audio_{seg_id}.mp3"))
-        
+        audio_path = os.path.join(OUTPUT_DIR, f"audio_{seg_id}.mp3")
         dst_path = os.path.join(OUTPUT_DIR, f"image_{seg_id}.jpg")
-        
-        # --- DECISION LOGIC ---
-        # 1. Is it the CENTENARY (2026)? -> FORCE AI (Red Theme)
-        if "2026" in text or "centenary" in text or "celebration" in text or "future" in text:
-            print(f"🔹 Segment {seg_id}: Future Event detected. Using AI (Red Theme).")
-            generate_ai_image(image_prompt, dst_path, style="red fire celebration")
+
+        decision = journal.completed(segment)
+        if decision and os.path.exists(dst_path) and os.path.exists(captions_path(audio_path)):
+            print(f"⏭️ Segment {seg_id}: already done ({decision['kind']}).")
             continue
 
-        # 2. Is it ANCIENT History (1926)? -> Try Real, fallback to AI (Vintage)
-        target_year = 2016 # Default
-        if "1926" in text: target_year = 1926
-        elif "1957" in text: target_year = 1957
-        elif "1976" in text: target_year = 1976
-        elif "2016" in text: target_year = 2016
+        # Audio: without a valid journal entry an existing take may be for an older narration
+        await generate_audio(segment['narration'], audio_path, force=decision is None)
 
-        match = get_real_image(target_year, real_images, used_images)
-        
-        if match:
-            # Use Real Photo
-            try:
-                shutil.copy(match['path'], dst_path)
-                used_images.add(match['path'])
-                print(f"🔹 Segment {seg_id}: Used Real Photo ({match['date']})")
-            except:
-                generate_ai_image(image_prompt, dst_path, style="photorealistic")
-        else:
-            # No real photo found -> Fallback to AI
-            style = "vintage" if target_year < 1980 else "photorealistic"
-            print(f"🔹 Segment {seg_id}: No real photo for {target_year}. Using AI ({style}).")
-            generate_ai_image(image_prompt, dst_path, style=style)
+        # A journaled segment whose image went missing is redone with the same choice
+        if not decision:
+            decision = decide_image(segment, real_images, used_images, image_index, real_by_path)
+        decision = render_image(segment, decision, dst_path)
+        if decision.get('source'):
+            used_images.add(decision['source'])
+        journal.record(segment, decision)
+
+    report_generation()
 
+    # Feed real TTS lengths back into the duration model
+    calibrate(INPUT_PLAN, OUTPUT_DIR)
     print(f"🎉 Assets Ready! Run: python editor.py")
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 import json
 import os
-import google.generativeai as genai
 from dotenv import load_dotenv
+from duration_planner import plan_durations
 
 # --- CONFIGURATION ---
 load_dotenv()
@@ -53,6 +53,7 @@ def main():
         print("❌ Error: GEMINI_API_KEY not found in .env")
         return
 
+    import google.generativeai as genai
     genai.configure(api_key=GEMINI_API_KEY)
     
     working_model = None
@@ -89,6 +90,11 @@ def main():
             content = content[start:end]
 
         script_json = json.loads(content)
+
+        # Check the 2-minute budget now, before TTS/diffusion/encoding are spent on it
+        print("\n⏱️ Planning narration length...")
+        plan_durations(script_json, trim=True)
+
         with open(OUTPUT_FILE, 'w') as f:
             json.dump(script_json, f, indent=4)
             
@@ -0,0 +1,347 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from checkpoint import atomic_write
+
+# --- CONFIGURATION ---
+WORKER_HOST = "127.0.0.1"
+WORKER_PORT = int(os.getenv("GEN_WORKER_PORT", "8765"))
+WORKER_URL = f"http://{WORKER_HOST}:{WORKER_PORT}"
+JOB_DB = "worker_jobs.sqlite"
+MODEL_ID = "runwayml/stable-diffusion-v1-5"
+INIT_IMAGE_MAX_SIZE = 768
+POLL_SECONDS = 0.5
+JOB_TIMEOUT_SECONDS = 3600   # give up on a job that has not finished in this long (model load + queue)
+
+# --- 1. GENERATION ENGINE (model stays loaded for the life of the process) ---
+class Engine:
+    """Owns the Stable Diffusion pipelines. Heavy imports happen on first use."""
+
+    def __init__(self, model_id=MODEL_ID):
+        self.model_id = model_id
+        self.pipe = None
+        self.img2img_pipe = None
+        self.prompt_cache = None
+        self.state = "idle"    # idle -> loading -> ready | failed
+        self.error = None
+
+    def load(self):
+        if self.pipe is not None:
+            return
+        import torch
+        from diffusers import StableDiffusionPipeline
+        from embedding_cache import PromptEmbeddingCache
+
+        print("⏳ Loading AI Model for Centenary generation...")
+        try:
+            pipe = StableDiffusionPipeline.from_pretrained(
+                self.model_id,
+                torch_dtype=torch.float16,
+                variant="fp16"
+            )
+            self.pipe = pipe.to("cuda")
+            print("✅ GPU Model Loaded!")
+        except:
+            print("⚠️ GPU Error. Falling back to CPU (Slower).")
+            self.pipe = StableDiffusionPipeline.from_pretrained(self.model_id)
+        self.prompt_cache = PromptEmbeddingCache(self.pipe, self.model_id)
+
+    def get_img2img_pipe(self):
+        """Builds the img2img pipeline from the already loaded components (no second model load)."""
+        from diffusers import StableDiffusionImg2ImgPipeline
+        if self.img2img_pipe is None:
+            self.img2img_pipe = StableDiffusionImg2ImgPipeline(**self.pipe.components)
+        return self.img2img_pipe
+
+    @staticmethod
+    def load_init_image(path):
+        """Opens a real photo and fits it to a diffusion-friendly size (multiples of 8)."""
+        from PIL import Image
+        image = Image.open(path).convert("RGB")
+        scale = min(1.0, INIT_IMAGE_MAX_SIZE / max(image.size))
+        width = max(8, int(image.width * scale) // 8 * 8)
+        height = max(8, int(image.height * scale) // 8 * 8)
+        return image.resize((width, height), Image.LANCZOS)
+
+    @staticmethod
+    def _progress_kwargs(progress, total_steps):
+        if progress is None:
+            return {}
+        def on_step_end(pipe, step, timestep, callback_kwargs):
+            progress((step + 1) / total_steps)
+            return callback_kwargs
+        return {"callback_on_step_end": on_step_end}
+
+    def run(self, kind, params, progress=None):
+        """Executes one job; `params` always carries an output `filename` and may carry a `seed`."""
+        self.load()
+        embeds = self.prompt_cache.pipeline_kwargs(params["prompt"])
+        steps = params.get("steps", 50)
+        if params.get("seed") is not None:
+            import torch
+            embeds["generator"] = torch.Generator(device=self.pipe.device).manual_seed(params["seed"])
+
+        if kind == "txt2img":
+            image = self.pipe(
+                **embeds, num_inference_steps=steps, **self._progress_kwargs(progress, steps)
+            ).images[0]
+        elif kind == "img2img":
+            strength = params.get("strength", 0.35)
+            effective = max(1, int(steps * strength))
+            image = self.get_img2img_pipe()(
+                **embeds,
+                image=self.load_init_image(params["src"]),
+                strength=strength,
+                num_inference_steps=steps,
+                **self._progress_kwargs(progress, effective),
+            ).images[0]
+        else:
+            raise ValueError(f"Unknown job type: {kind}")
+
+        with atomic_write(params["filename"]) as tmp_path:
+            image.save(tmp_path)
+        return {"filename": params["filename"]}
+
+# --- 2. PERSISTENT PRIORITY QUEUE ---
+class JobQueue:
+    """SQLite-backed job table; higher priority first, then submission order."""
+
+    def __init__(self, path=JOB_DB):
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT, params TEXT, priority INTEGER DEFAULT 0,
+                    status TEXT DEFAULT 'queued', progress REAL DEFAULT 0,
+                    result TEXT, error TEXT, created REAL, finished REAL
+                )""")
+            # Jobs that were running when the worker died go back on the queue
+            self.db.execute("UPDATE jobs SET status = 'queued', progress = 0 WHERE status = 'running'")
+        self.ready.set()
+
+    def submit(self, kind, params, priority=0):
+        with self.lock, self.db:
+            cur = self.db.execute(
+                "INSERT INTO jobs (kind, params, priority, created) VALUES (?, ?, ?, ?)",
+                (kind, json.dumps(params), priority, time.time()),
+            )
+        self.ready.set()
+        return cur.lastrowid
+
+    def claim_next(self):
+        with self.lock, self.db:
+            row = self.db.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self.ready.clear()
+                return None
+            self.db.execute("UPDATE jobs SET status = 'running' WHERE id = ?", (row["id"],))
+        return row
+
+    def fail_queued(self, error):
+        """Fails every queued job at once (used when the engine cannot start)."""
+        with self.lock, self.db:
+            self.db.execute("UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE status = 'queued'",
+                            (error, time.time()))
+            self.ready.clear()
+
+    def update(self, job_id, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self.lock, self.db:
+            self.db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["queued_ahead"] = self._queued_ahead(row)
+        return job
+
+    def _queued_ahead(self, row):
+        if row["status"] != "queued":
+            return 0
+        with self.lock:
+            return self.db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND (priority > ? OR (priority = ? AND id < ?))",
+                (row["priority"], row["priority"], row["id"]),
+            ).fetchone()[0]
+
+def worker_loop(engine, queue):
+    engine.state = "loading"
+    try:
+        engine.load()
+    except Exception as e:
+        engine.state, engine.error = "failed", f"{type(e).__name__}: {e}"
+        print(f"❌ Model failed to load: {engine.error}")
+        # Nothing can run: fail what is waiting and everything submitted later
+        while True:
+            queue.fail_queued(f"worker engine failed to load: {engine.error}")
+            queue.ready.wait()
+    engine.state = "ready"
+    print(f"🟢 Worker ready on {WORKER_URL}")
+    while True:
+        queue.ready.wait()
+        row = queue.claim_next()
+        if row is None:
+            continue
+        job_id = row["id"]
+        print(f"🎨 Job {job_id}: {row['kind']}")
+        try:
+            result = engine.run(
+                row["kind"], json.loads(row["params"]),
+                progress=lambda fraction: queue.update(job_id, progress=round(fraction, 3)),
+            )
+            queue.update(job_id, status="done", progress=1.0, result=json.dumps(result), finished=time.time())
+            print(f"   ✅ Job {job_id} done.")
+            engine.prompt_cache.report()
+        except Exception as e:
+            queue.update(job_id, status="failed", error=str(e), finished=time.time())
+            print(f"   ❌ Job {job_id} failed: {e}")
+
+# --- 3. LOCAL HTTP INTERFACE ---
+class WorkerHandler(BaseHTTPRequestHandler):
+    queue = None
+    engine = None
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            state = self.engine.state
+            return self._send(200, {
+                "status": "ok" if state == "ready" else state,
+                "model": MODEL_ID,
+                "error": self.engine.error,
+            })
+        if self.path.startswith("/jobs/"):
+            try:
+                job = self.queue.get(int(self.path.rsplit("/", 1)[1]))
+            except ValueError:
+                job = None
+            return self._send(200, job) if job else self._send(404, {"error": "no such job"})
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            return self._send(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            job_id = self.queue.submit(request["kind"], request["params"], int(request.get("priority", 0)))
+        except Exception as e:
+            return self._send(400, {"error": str(e)})
+        self._send(201, {"id": job_id})
+
+    def log_message(self, format, *args):
+        pass  # keep the console for job progress
+
+def serve(host=WORKER_HOST, port=WORKER_PORT):
+    queue = JobQueue()
+    engine = Engine()
+    WorkerHandler.queue = queue
+    WorkerHandler.engine = engine
+    threading.Thread(target=worker_loop, args=(engine, queue), daemon=True).start()
+    server = ThreadingHTTPServer((host, port), WorkerHandler)
+    print(f"🚀 Generation worker listening on http://{host}:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Worker stopped.")
+
+# --- 4. CLIENT (used by the asset scripts) ---
+def _request(method, path, payload=None, timeout=10):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(WORKER_URL + path, data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return json.loads(response.read())
+
+def worker_health():
+    try:
+        return _request("GET", "/health", timeout=0.5)
+    except:
+        return None
+
+def worker_available():
+    """True if a worker is up and its engine is ready or still loading (jobs will run)."""
+    health = worker_health()
+    return health is not None and health.get("status") in ("ok", "idle", "loading")
+
+def submit_job(kind, params, priority=0):
+    return _request("POST", "/jobs", {"kind": kind, "params": params, "priority": priority})["id"]
+
+def wait_for_job(job_id, timeout=JOB_TIMEOUT_SECONDS):
+    """Polls until the job finishes; raises if the worker dies, its engine fails or `timeout` passes."""
+    last = None
+    deadline = time.time() + timeout
+    while True:
+        try:
+            job = _request("GET", f"/jobs/{job_id}")
+        except Exception as e:
+            raise RuntimeError(f"Generation worker stopped responding: {e}")
+        if job["status"] in ("done", "failed"):
+            return job
+        if job["status"] == "queued":
+            health = worker_health()
+            if health is None or health.get("status") == "failed":
+                error = health.get("error") if health else "worker unreachable"
+                raise RuntimeError(f"Generation worker cannot run jobs: {error}")
+        if time.time() > deadline:
+            raise TimeoutError(f"Job {job_id} not finished after {timeout}s ({job['status']})")
+        status = (f"queued ({job['queued_ahead']} ahead)" if job["status"] == "queued"
+                  else f"{int(job['progress'] * 100)}%")
+        if status != last:
+            print(f"   ⏳ Job {job_id}: {status}")
+            last = status
+        time.sleep(POLL_SECONDS)
+
+_local_engine = None
+
+def generate(kind, params, priority=0):
+    """Runs a generation job on the warm worker if one is running, otherwise in-process."""
+    global _local_engine
+    params = dict(params, filename=os.path.abspath(params["filename"]))
+    if "src" in params:
+        params["src"] = os.path.abspath(params["src"])
+
+    if worker_available():
+        job = wait_for_job(submit_job(kind, params, priority))
+        if job["status"] == "failed":
+            raise RuntimeError(job["error"])
+        return job["result"]
+
+    if _local_engine is None:
+        print("ℹ️ No generation worker running (start one with: python gen_worker.py). Loading model in-process.")
+        _local_engine = Engine()
+    return _local_engine.run(kind, params)
+
+def report():
+    """Prints prompt-cache stats for in-process runs (the worker prints its own)."""
+    if _local_engine is not None and _local_engine.prompt_cache is not None:
+        _local_engine.prompt_cache.report()
+
+if __name__ == "__main__":
+    if "--port" in sys.argv:
+        WORKER_PORT = int(sys.argv[sys.argv.index("--port") + 1])
+        WORKER_URL = f"http://{WORKER_HOST}:{WORKER_PORT}"
+    serve(port=WORKER_PORT)
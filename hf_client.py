@@ -0,0 +1,119 @@
+import os
+import asyncio
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- CONFIGURATION ---
+MAX_CONCURRENCY = 4       # simultaneous requests to the image API
+MAX_ATTEMPTS = 5
+BASE_DELAY = 2.0          # seconds, doubled after every failed attempt
+MAX_DELAY = 60.0
+REQUEST_TIMEOUT = 120
+CHUNK_SIZE = 64 * 1024
+
+class ImageAPIClient:
+    """Async wrapper around a pooled requests.Session for the Hugging Face image endpoints.
+
+    Requests run in worker threads so the event loop keeps serving TTS while images
+    download. A semaphore bounds concurrency and the session reuses TLS connections.
+    """
+
+    def __init__(self, api_url, token, max_concurrency=MAX_CONCURRENCY,
+                 max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY,
+                 timeout=REQUEST_TIMEOUT):
+        self.api_url = api_url
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.stats = {"requests": 0, "retries": 0, "bytes": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _retry_delay(self, response, attempt):
+        """How long to wait before the next attempt (server hints win over backoff)."""
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        if response is None:
+            return delay
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        if response.status_code == 503:
+            # {"error": "Model ... is currently loading", "estimated_time": 20.0}
+            try:
+                estimated = float(response.json().get("estimated_time", 0))
+                if estimated > 0:
+                    return min(estimated, self.max_delay)
+            except:
+                pass
+        return delay
+
+    def _post_to_file(self, payload, filename):
+        """Blocking POST; streams a 200 body to disk. Returns (ok, response_or_error)."""
+        self.stats["requests"] += 1
+        try:
+            response = self.session.post(self.api_url, json=payload, stream=True, timeout=self.timeout)
+        except requests.RequestException as e:
+            return False, e
+
+        with response:
+            if response.status_code != 200:
+                response.content  # read the error body so the connection can be reused
+                return False, response
+
+            tmp_path = filename + ".part"
+            written = 0
+            try:
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        written += len(chunk)
+                os.replace(tmp_path, filename)
+            except (requests.RequestException, OSError) as e:
+                # Connection dropped mid-body: discard the partial image and let the caller retry
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return False, e
+            self.stats["bytes"] += written
+            return True, response
+
+    async def generate(self, prompt, filename):
+        """Generates one image for `prompt` into `filename`. Returns True on success."""
+        async with self._semaphore:
+            for attempt in range(self.max_attempts):
+                ok, result = await asyncio.to_thread(self._post_to_file, {"inputs": prompt}, filename)
+                if ok:
+                    return True
+
+                if isinstance(result, Exception):
+                    print(f"   ❌ Connection Error (Attempt {attempt+1}): {result}")
+                    response = None
+                else:
+                    response = result
+                    retryable = response.status_code in (429, 500, 502, 503, 504) or "loading" in response.text
+                    if not retryable:
+                        print(f"   ❌ API Error {response.status_code}: {response.text[:200]}")
+                        return False
+                    print(f"   ⚠️ API Error {response.status_code} (Attempt {attempt+1}): {response.text[:200]}")
+
+                if attempt + 1 < self.max_attempts:
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(self._retry_delay(response, attempt))
+        return False
@@ -0,0 +1,115 @@
+import os
+import json
+import asyncio
+import tempfile
+import subprocess
+from subtitles import synthesize_with_timings, captions_path
+from duration_planner import probe_duration
+from output_profiles import ffmpeg_binary
+
+# --- CONFIGURATION ---
+INPUT_FILE = "video_plan.json"
+ASSETS_DIR = "assets"
+TTS_CONCURRENCY = 6
+
+# The first track is the primary narration (assets/audio_{id}.mp3, as used everywhere else).
+# A segment may carry translated text under "narrations": {"hin": "..."}; otherwise the
+# track voice reads the default narration.
+NARRATION_TRACKS = [
+    {"lang": "eng", "voice": "en-US-ChristopherNeural", "title": "English"},
+    {"lang": "hin", "voice": "hi-IN-MadhurNeural", "title": "Hindi"},
+    {"lang": "ben", "voice": "bn-IN-BashkarNeural", "title": "Bengali"},
+]
+SAMPLE_RATE = 44100
+AUDIO_BITRATE = "192k"
+
+def track_audio_path(assets_dir, seg_id, track, primary=False):
+    if primary:
+        return os.path.join(assets_dir, f"audio_{seg_id}.mp3")
+    return os.path.join(assets_dir, f"audio_{seg_id}_{track['lang']}.mp3")
+
+def track_text(segment, track):
+    return segment.get('narrations', {}).get(track['lang'], segment['narration'])
+
+async def synthesize_tracks(plan, assets_dir=ASSETS_DIR, tracks=NARRATION_TRACKS):
+    """Synthesizes every segment in every voice concurrently; existing takes are kept."""
+    semaphore = asyncio.Semaphore(TTS_CONCURRENCY)
+
+    async def synthesize(segment, track, primary):
+        path = track_audio_path(assets_dir, segment['id'], track, primary)
+        if os.path.exists(path) and os.path.getsize(path) > 0 and os.path.exists(captions_path(path)):
+            return
+        async with semaphore:
+            print(f"🎙️ {track['title']}: segment {segment['id']}")
+            await synthesize_with_timings(track_text(segment, track), track['voice'], path, captions_path(path))
+
+    os.makedirs(assets_dir, exist_ok=True)
+    await asyncio.gather(*(
+        synthesize(segment, track, i == 0)
+        for segment in plan['segments']
+        for i, track in enumerate(tracks)
+    ))
+
+def segment_durations(plan, assets_dir=ASSETS_DIR, tracks=NARRATION_TRACKS):
+    """Shared timing: each segment lasts as long as its longest take across all tracks."""
+    durations = {}
+    for segment in plan['segments']:
+        takes = [probe_duration(track_audio_path(assets_dir, segment['id'], track, i == 0))
+                 for i, track in enumerate(tracks)]
+        takes = [t for t in takes if t]
+        if takes:
+            durations[segment['id']] = max(takes)
+    return durations
+
+def build_track(segment_ids, durations, assets_dir, track, primary, output_path, workdir):
+    """Pads each take with silence to the shared segment length and joins them into one AAC track."""
+    padded = []
+    for seg_id in segment_ids:
+        source = track_audio_path(assets_dir, seg_id, track, primary)
+        target = os.path.join(workdir, f"{track['lang']}_{seg_id}.wav")
+        if os.path.exists(source):
+            cmd = [ffmpeg_binary(), "-y", "-loglevel", "error", "-i", source,
+                   "-af", f"apad=whole_dur={durations[seg_id]:.3f}", "-t", f"{durations[seg_id]:.3f}",
+                   "-ar", str(SAMPLE_RATE), "-ac", "2", target]
+        else:
+            cmd = [ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+                   "-i", f"anullsrc=r={SAMPLE_RATE}:cl=stereo", "-t", f"{durations[seg_id]:.3f}", target]
+        subprocess.run(cmd, check=True)
+        padded.append(target)
+
+    list_path = os.path.join(workdir, f"{track['lang']}.txt")
+    with open(list_path, 'w') as f:
+        f.writelines(f"file '{path}'\n" for path in padded)
+    subprocess.run([ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                    "-i", list_path, "-c:a", "aac", "-b:a", AUDIO_BITRATE, output_path], check=True)
+    for path in padded:
+        os.remove(path)
+
+def mux_tracks(video_path, segment_ids, durations, output_video, assets_dir=ASSETS_DIR, tracks=NARRATION_TRACKS):
+    """Stream-copies the already encoded video and adds one language-tagged audio stream per track."""
+    with tempfile.TemporaryDirectory() as workdir:
+        track_paths = []
+        for i, track in enumerate(tracks):
+            path = os.path.join(workdir, f"{track['lang']}.m4a")
+            print(f"   🔊 Building {track['title']} track...")
+            build_track(segment_ids, durations, assets_dir, track, i == 0, path, workdir)
+            track_paths.append(path)
+
+        cmd = [ffmpeg_binary(), "-y", "-loglevel", "error", "-i", video_path]
+        for path in track_paths:
+            cmd += ["-i", path]
+        cmd += ["-map", "0:v"]
+        for i in range(len(track_paths)):
+            cmd += ["-map", f"{i + 1}:a"]
+        cmd += ["-c", "copy"]
+        for i, track in enumerate(tracks):
+            cmd += [f"-metadata:s:a:{i}", f"language={track['lang']}",
+                    f"-metadata:s:a:{i}", f"title={track['title']}",
+                    f"-disposition:a:{i}", "default" if i == 0 else "0"]
+        cmd += ["-movflags", "+faststart", output_video]
+        subprocess.run(cmd, check=True)
+
+if __name__ == "__main__":
+    with open(INPUT_FILE, 'r') as f:
+        asyncio.run(synthesize_tracks(json.load(f)))
+    print("🎉 All narration tracks ready. Run: python editor.py --tracks")
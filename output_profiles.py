@@ -0,0 +1,203 @@
+import os
+import queue
+import threading
+import subprocess
+from subtitles import render_caption
+
+# --- CONFIGURATION ---
+# aspect "fit" letterboxes the full frame, "crop" smart-crops each still to the target aspect
+PROFILES = {
+    "1080p":    {"size": (1920, 1080), "aspect": "fit",  "bitrate": "6M",   "preset": "medium"},
+    "720p":     {"size": (1280, 720),  "aspect": "fit",  "bitrate": "3M",   "preset": "fast"},
+    "vertical": {"size": (1080, 1920), "aspect": "crop", "bitrate": "5M",   "preset": "medium"},
+}
+FRAME_QUEUE_SIZE = 48     # frames buffered per encoder (~2s at 24 fps)
+AUDIO_BITRATE = "192k"
+
+def ffmpeg_binary():
+    try:
+        from moviepy.config import get_setting
+        return get_setting("FFMPEG_BINARY")
+    except:
+        return "ffmpeg"
+
+def output_path(base_output, profile_name):
+    stem, ext = os.path.splitext(base_output)
+    return f"{stem}_{profile_name}{ext or '.mp4'}"
+
+# --- SMART CROP ---
+def smart_crop_x(frame, crop_width):
+    """Left edge of the crop window with the most edge detail (where the subject usually is)."""
+    import numpy as np
+    width = frame.shape[1]
+    if crop_width >= width:
+        return 0
+    gray = frame.astype(np.float32).mean(axis=2)
+    energy = np.abs(np.diff(gray, axis=1)).sum(axis=0)
+    energy = np.concatenate([[0.0], energy])
+    window = np.convolve(energy, np.ones(crop_width), mode="valid")
+    # Favour the centre slightly so flat images stay centred
+    centre_bias = 1.0 - 0.15 * np.abs(np.linspace(-1, 1, len(window)))
+    return int(np.argmax(window * centre_bias))
+
+class SpanCropper:
+    """Per-segment crop offsets; computed once on the first frame of each still."""
+
+    def __init__(self, spans, frame_size, target_size):
+        self.spans = spans  # [(start, end)] on the output timeline
+        frame_width, frame_height = frame_size
+        target_width, target_height = target_size
+        self.crop_width = min(frame_width, int(round(frame_height * target_width / target_height)) // 2 * 2)
+        self.offsets = {}
+
+    def _span_index(self, t):
+        for i, (start, end) in enumerate(self.spans):
+            if start <= t < end:
+                return i
+        return len(self.spans) - 1
+
+    def __call__(self, t, frame):
+        i = self._span_index(t)
+        if i not in self.offsets:
+            self.offsets[i] = smart_crop_x(frame, self.crop_width)
+        x = self.offsets[i]
+        return frame[:, x:x + self.crop_width]
+
+# --- ENCODERS ---
+class ProfileEncoder:
+    """One ffmpeg process fed raw RGB frames through a bounded queue on its own thread.
+
+    Captions are burned in here, after the crop, so a 9:16 crop never cuts a caption line.
+    """
+
+    def __init__(self, name, profile, frame_size, fps, audio_path, output, spans, captions=None):
+        self.name = name
+        self.output = output
+        width, height = profile["size"]
+        self.cropper = SpanCropper(spans, frame_size, profile["size"]) if profile["aspect"] == "crop" else None
+        in_width = self.cropper.crop_width if self.cropper else frame_size[0]
+        in_height = frame_size[1]
+        self.in_size = (in_width, in_height)
+        self.captions = sorted(captions or [], key=lambda c: c["start"])
+        self.caption_index = 0
+        self.overlay_index, self.overlay = None, None
+
+        if self.cropper:
+            vf = f"scale={width}:{height}"
+        else:
+            vf = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                  f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2")
+
+        cmd = [
+            ffmpeg_binary(), "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{in_width}x{in_height}", "-r", str(fps), "-i", "-",
+        ]
+        if audio_path:
+            cmd += ["-i", audio_path, "-map", "0:v", "-map", "1:a", "-c:a", "copy"]
+        cmd += [
+            "-vf", vf, "-c:v", "libx264", "-preset", profile["preset"], "-b:v", profile["bitrate"],
+            "-pix_fmt", "yuv420p", "-movflags", "+faststart", "-shortest", output,
+        ]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        self.error = None
+        self.frames = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+        self.thread = threading.Thread(target=self._pump, daemon=True)
+        self.thread.start()
+
+    def _pump(self):
+        try:
+            while True:
+                data = self.frames.get()
+                if data is None:
+                    break
+                self.process.stdin.write(data)
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError) as e:
+            # ffmpeg exited early; stop feeding it so put() never blocks on a full queue
+            self.error = e
+
+    @property
+    def alive(self):
+        return self.error is None and self.thread.is_alive()
+
+    def _caption_overlay(self, t):
+        """The caption visible at `t`, rasterized for this encoder's frame (frames arrive in order)."""
+        while self.caption_index < len(self.captions) and self.captions[self.caption_index]["end"] <= t:
+            self.caption_index += 1
+        if self.caption_index >= len(self.captions) or self.captions[self.caption_index]["start"] > t:
+            return None
+        if self.overlay_index != self.caption_index:
+            self.overlay = render_caption(self.captions[self.caption_index]["text"], *self.in_size)
+            self.overlay_index = self.caption_index
+        return self.overlay
+
+    def put(self, t, frame):
+        if self.cropper:
+            frame = self.cropper(t, frame)
+        overlay = self._caption_overlay(t) if self.captions else None
+        if overlay is not None:
+            from timeline import composite
+            frame = composite(frame, overlay, self.in_size)
+        data = frame.tobytes()  # always C-ordered, even for a cropped view
+        while self.alive:
+            try:
+                self.frames.put(data, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self):
+        """Returns ffmpeg's exit code (non-zero if the encoder died mid-stream)."""
+        if self.thread.is_alive():
+            while True:
+                try:
+                    self.frames.put(None, timeout=1)
+                    break
+                except queue.Full:
+                    if not self.thread.is_alive():
+                        break
+        self.thread.join()
+        code = self.process.wait()
+        if self.error is not None and code == 0:
+            return 1
+        return code
+
+def render_profiles(final_video, base_output, profile_names, spans, fps=24, captions=None):
+    """Composites `final_video` once and fans the frames out to one encoder per profile.
+
+    The narration is encoded to AAC a single time and stream-copied into every output.
+    `captions` (timeline-relative) are burned in per encoder, after that profile's crop.
+    Returns {profile_name: output_path} for the encodes that succeeded.
+    """
+    audio_path = None
+    if final_video.audio is not None:
+        audio_path = os.path.splitext(base_output)[0] + "_narration.m4a"
+        print(f"   🔊 Encoding shared narration track -> {audio_path}")
+        final_video.audio.write_audiofile(audio_path, fps=44100, codec="aac", bitrate=AUDIO_BITRATE, logger=None)
+
+    frame_size = tuple(final_video.size)
+    encoders = []
+    for name in profile_names:
+        output = output_path(base_output, name)
+        print(f"   🎞️ {name}: {PROFILES[name]['size'][0]}x{PROFILES[name]['size'][1]} -> {output}")
+        encoders.append(ProfileEncoder(name, PROFILES[name], frame_size, fps, audio_path, output, spans, captions))
+
+    for i, frame in enumerate(final_video.iter_frames(fps=fps, dtype="uint8")):
+        t = i / fps
+        live = [encoder for encoder in encoders if encoder.alive]
+        if not live:
+            print("   ❌ Every encoder exited early; stopping.")
+            break
+        for encoder in live:
+            encoder.put(t, frame)
+
+    outputs = {}
+    for encoder in encoders:
+        if encoder.finish() == 0:
+            outputs[encoder.name] = encoder.output
+        else:
+            print(f"   ❌ Encoder for {encoder.name} failed{f' ({encoder.error})' if encoder.error else ''}.")
+
+    if audio_path and os.path.exists(audio_path):
+        os.remove(audio_path)
+    return outputs
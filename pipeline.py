@@ -0,0 +1,180 @@
+import os
+import re
+import sys
+import asyncio
+import argparse
+import subprocess
+
+# Single entry point for every stage. Stage modules are imported inside each command so
+# `--help` and cached no-op runs never pay for torch, diffusers, moviepy, bs4 or pypdf.
+
+# --- CONFIGURATION ---
+IMPORT_BUDGET_MS = 250    # cumulative import time allowed per stage module
+STAGE_MODULES = [
+    "pipeline", "data_loader", "gen_script", "duration_planner", "gen_assets_real",
+    "gen_assets_cuda", "gen_worker", "editor", "batch", "narration_tracks",
+]
+HEAVY_MODULES = ["torch", "diffusers", "moviepy", "bs4", "pypdf", "google.generativeai", "numpy", "PIL"]
+
+def cmd_crawl(args):
+    import data_loader
+    data_loader.main()
+
+def cmd_script(args):
+    import gen_script
+    gen_script.main()
+
+def cmd_plan(args):
+    import json
+    import duration_planner
+    if args.calibrate:
+        duration_planner.calibrate()
+    with open(args.plan, 'r') as f:
+        plan = json.load(f)
+    duration_planner.plan_durations(plan, trim=args.trim)
+    if args.trim:
+        with open(args.plan, 'w') as f:
+            json.dump(plan, f, indent=4)
+
+def cmd_assets(args):
+    if args.engine == "real":
+        import gen_assets_real as module
+    elif args.engine == "cuda":
+        import gen_assets_cuda as module
+    else:
+        import gen_assets as module
+    asyncio.run(module.main())
+
+def cmd_worker(args):
+    import gen_worker
+    gen_worker.serve(port=args.port)
+
+def cmd_edit(args):
+    import editor
+    profiles = args.profiles.split(",") if args.profiles else None
+    segment_range = editor.parse_segment_range(args.segments) if args.segments else None
+    tracks = None
+    if args.tracks:
+        from narration_tracks import NARRATION_TRACKS
+        tracks = NARRATION_TRACKS
+    editor.create_video(profiles=profiles, draft=args.draft, segment_range=segment_range,
+                        streaming=True if args.stream else None, tracks=tracks)
+
+def cmd_tracks(args):
+    import json
+    import narration_tracks
+    with open(args.plan, 'r') as f:
+        asyncio.run(narration_tracks.synthesize_tracks(json.load(f)))
+
+def cmd_batch(args):
+    import batch
+    asyncio.run(batch.main(args.batch_file))
+
+def cmd_bench(args):
+    import benchmark
+    benchmark.main(args.bench_args)
+
+# --- STARTUP BUDGET CHECK ---
+def measure_import(module):
+    """Runs `python -X importtime -c "import <module>"`; returns (cumulative_ms, imported names, error)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    names = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.*)$", line)
+        if match:
+            names[match.group(3).strip()] = int(match.group(2)) / 1000
+    error = None
+    if result.returncode != 0:
+        error = (result.stderr.strip().splitlines() or ["import failed"])[-1]
+    return names.get(module, 0.0), names, error
+
+def check_startup(modules=None, budget_ms=IMPORT_BUDGET_MS, allow_missing=False):
+    """Returns the number of stage modules that import heavy deps eagerly, are too slow, or fail to import.
+
+    A module that cannot be imported hides whatever it would have imported after the failure,
+    so it only passes with `allow_missing` (for machines without the full environment).
+    """
+    failures = 0
+    for module in modules or STAGE_MODULES:
+        cumulative_ms, names, error = measure_import(module)
+        heavy = [h for h in HEAVY_MODULES if h in names]
+        if error and not heavy:
+            if allow_missing:
+                print(f"   ⏭️ {module}: skipped ({error})")
+            else:
+                print(f"   ❌ {module}: import failed ({error}); pass --allow-missing to skip")
+                failures += 1
+            continue
+        if heavy:
+            print(f"   ❌ {module}: imports {', '.join(heavy)} at module level")
+            failures += 1
+        elif cumulative_ms > budget_ms:
+            print(f"   ❌ {module}: {cumulative_ms:.0f} ms (budget {budget_ms} ms)")
+            failures += 1
+        else:
+            print(f"   ✅ {module}: {cumulative_ms:.0f} ms")
+    return failures
+
+def cmd_check_startup(args):
+    failures = check_startup(budget_ms=args.budget_ms, allow_missing=args.allow_missing)
+    if failures:
+        print(f"❌ {failures} module(s) failed the startup check.")
+        sys.exit(1)
+    print("🎉 Startup budget OK.")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pipeline", description="The Code of Legacy: GenAI video pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("crawl", help="Scan the dataset into filtered_data.json / available_assets.json").set_defaults(func=cmd_crawl)
+    sub.add_parser("script", help="Write video_plan.json with Gemini").set_defaults(func=cmd_script)
+
+    plan = sub.add_parser("plan", help="Predict narration length (and optionally trim the plan)")
+    plan.add_argument("--plan", default="video_plan.json")
+    plan.add_argument("--trim", action="store_true")
+    plan.add_argument("--calibrate", action="store_true", help="refit against existing assets first")
+    plan.set_defaults(func=cmd_plan)
+
+    assets = sub.add_parser("assets", help="Generate narration audio and images")
+    assets.add_argument("--engine", choices=["real", "cuda", "api"], default="real")
+    assets.set_defaults(func=cmd_assets)
+
+    worker = sub.add_parser("worker", help="Run the warm generation worker")
+    worker.add_argument("--port", type=int, default=int(os.getenv("GEN_WORKER_PORT", "8765")))
+    worker.set_defaults(func=cmd_worker)
+
+    edit = sub.add_parser("edit", help="Render the final video")
+    edit.add_argument("--profiles", help="comma-separated output profiles, e.g. 1080p,720p,vertical")
+    edit.add_argument("--draft", action="store_true", help="fast low-resolution preview")
+    edit.add_argument("--segments", help="only render segment ids in this range, e.g. 3-5")
+    edit.add_argument("--stream", action="store_true", help="force the streaming long-timeline engine")
+    edit.add_argument("--tracks", action="store_true", help="mux every narration voice as an alternate audio stream")
+    edit.set_defaults(func=cmd_edit)
+
+    tracks = sub.add_parser("tracks", help="Synthesize the narration in every configured voice")
+    tracks.add_argument("--plan", default="video_plan.json")
+    tracks.set_defaults(func=cmd_tracks)
+
+    batch = sub.add_parser("batch", help="Render several plan variants from one asset pool")
+    batch.add_argument("batch_file", nargs="?", default="batch.json")
+    batch.set_defaults(func=cmd_batch)
+
+    bench = sub.add_parser("bench", help="Synthetic end-to-end benchmarks (see benchmark.py --help)")
+    bench.add_argument("bench_args", nargs=argparse.REMAINDER)
+    bench.set_defaults(func=cmd_bench)
+
+    check = sub.add_parser("check-startup", help="Fail if a stage module imports heavy dependencies eagerly")
+    check.add_argument("--budget-ms", type=int, default=IMPORT_BUDGET_MS)
+    check.add_argument("--allow-missing", action="store_true", help="skip modules whose own dependencies are not installed")
+    check.set_defaults(func=cmd_check_startup)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import os
+import re
+import json
+import hashlib
+from checkpoint import atomic_write
+
+# --- CONFIGURATION ---
+CAPTION_MAX_CHARS = 42        # one readable line
+CAPTION_MAX_SECONDS = 3.5
+CAPTION_FONT = "DejaVuSans-Bold.ttf"
+CAPTION_FONT_RATIO = 0.045    # font size relative to frame height
+CAPTION_CACHE_DIR = os.path.join("cache", "captions")
+
+TICKS_PER_SECOND = 10_000_000  # edge_tts offsets are in 100ns units
+ALIGN_WINDOW = 80              # max characters skipped when looking a spoken word up in the narration
+SENTENCE_END = (".", "!", "?")
+CLOSING_MARKS = "\"')]»”’"
+
+# --- 1. WORD TIMINGS DURING TTS ---
+def captions_path(audio_path):
+    """assets/audio_3.mp3 -> assets/captions_3.json"""
+    folder, name = os.path.split(audio_path)
+    stem = os.path.splitext(name)[0]
+    if stem.startswith("audio_"):
+        stem = stem[len("audio_"):]
+    return os.path.join(folder, f"captions_{stem}.json")
+
+async def synthesize_with_timings(text, voice, audio_path, timings_path):
+    """Synthesizes `text` like Communicate.save() but also records WordBoundary timings."""
+    import edge_tts
+    try:
+        communicate = edge_tts.Communicate(text, voice, boundary="WordBoundary")
+    except TypeError:
+        communicate = edge_tts.Communicate(text, voice)  # older edge_tts always emits words
+
+    words = []
+    with atomic_write(audio_path) as tmp_audio, open(tmp_audio, "wb") as f:
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                f.write(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                words.append({
+                    "text": chunk["text"],
+                    "start": chunk["offset"] / TICKS_PER_SECOND,
+                    "end": (chunk["offset"] + chunk["duration"]) / TICKS_PER_SECOND,
+                })
+    words = align_words(words, text)
+
+    with atomic_write(timings_path) as tmp_timings, open(tmp_timings, "w", encoding="utf-8") as f:
+        json.dump(words, f, indent=2)
+    return words
+
+def align_words(words, text):
+    """Maps WordBoundary timings back onto the narration, restoring the punctuation TTS drops.
+
+    Each word takes the text of the narration token it was found in (so "1926" becomes "1926.")
+    and is flagged `sentence_end` when that token closes a sentence. Unmatched words are kept as is.
+    """
+    lowered = text.lower()
+    tokens = [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]
+    token_of = {}
+    for i, (start, end) in enumerate(tokens):
+        for pos in range(start, end):
+            token_of[pos] = i
+
+    # 1. Locate every word in order
+    matches = []
+    cursor = 0
+    for word in words:
+        spoken = word["text"].lower()
+        found = lowered.find(spoken, cursor) if spoken else -1
+        if found < 0 or found - cursor > ALIGN_WINDOW:
+            matches.append(None)
+            continue
+        matches.append((found, found + len(spoken), token_of[found]))
+        cursor = found + len(spoken)
+
+    # 2. Widen each match to its token; words sharing a token split it between them
+    aligned = []
+    for i, (word, match) in enumerate(zip(words, matches)):
+        word = dict(word)
+        if match:
+            found, end, token = match
+            prev = next((m for m in reversed(matches[:i]) if m), None)
+            following = next((m for m in matches[i + 1:] if m), None)
+            word["joined"] = bool(prev and prev[2] == token)  # no space before it in a caption
+            start = found if word["joined"] else tokens[token][0]
+            end = following[0] if following and following[2] == token else tokens[token][1]
+            word["text"] = text[start:end].strip()
+            word["sentence_end"] = word["text"].rstrip(CLOSING_MARKS).endswith(SENTENCE_END)
+        aligned.append(word)
+    return aligned
+
+def load_timings(timings_path, text=None):
+    """Word timings for one take; pass the narration `text` to align older unpunctuated files."""
+    if not os.path.exists(timings_path):
+        return []
+    with open(timings_path, "r", encoding="utf-8") as f:
+        words = json.load(f)
+    if text and not any("sentence_end" in w for w in words):
+        words = align_words(words, text)
+    return words
+
+# --- 2. CAPTION LINES ---
+def _join(words):
+    return "".join(("" if i == 0 or w.get("joined") else " ") + w["text"] for i, w in enumerate(words))
+
+def group_captions(words, max_chars=CAPTION_MAX_CHARS, max_seconds=CAPTION_MAX_SECONDS):
+    """Groups word timings into caption lines: [{"start", "end", "text"}]."""
+    captions = []
+    current = []
+    for word in words:
+        if current:
+            text = _join(current + [word])
+            too_long = len(text) > max_chars or word["end"] - current[0]["start"] > max_seconds
+            if too_long:
+                captions.append(current)
+                current = []
+        current.append(word)
+        if word.get("sentence_end", word["text"].endswith(SENTENCE_END)):
+            captions.append(current)
+            current = []
+    if current:
+        captions.append(current)
+
+    return [
+        {"start": line[0]["start"], "end": line[-1]["end"], "text": _join(line)}
+        for line in captions
+    ]
+
+# --- 3. SIDECAR SRT ---
+def _srt_time(seconds):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+
+def write_srt(captions, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, caption in enumerate(captions, 1):
+            f.write(f"{i}\n{_srt_time(caption['start'])} --> {_srt_time(caption['end'])}\n{caption['text']}\n\n")
+
+# --- 4. PRE-RASTERIZED OVERLAYS ---
+_font_cache = {}
+
+def _font(size):
+    from PIL import ImageFont
+    if size not in _font_cache:
+        try:
+            _font_cache[size] = ImageFont.truetype(CAPTION_FONT, size)
+        except OSError:
+            try:
+                _font_cache[size] = ImageFont.load_default(size)  # Pillow >= 10.1
+            except TypeError:
+                _font_cache[size] = ImageFont.load_default()  # fixed-size bitmap font
+    return _font_cache[size]
+
+def wrap_caption(text, font, max_width, measure):
+    """Greedy word wrap by measured pixel width; a single over-long word keeps its own line."""
+    lines = []
+    for word in text.split():
+        candidate = f"{lines[-1]} {word}" if lines else word
+        left, _, right, _ = measure.textbbox((0, 0), candidate, font=font, stroke_width=2)
+        if lines and right - left <= max_width:
+            lines[-1] = candidate
+        else:
+            lines.append(word)
+    return "\n".join(lines)
+
+def render_caption(text, frame_width, frame_height):
+    """Rasterizes one caption to an RGBA array, once; later calls load the cached PNG."""
+    import numpy as np
+    from PIL import Image, ImageDraw
+    os.makedirs(CAPTION_CACHE_DIR, exist_ok=True)
+    key = hashlib.sha1(f"{frame_width}x{frame_height}\nwrapped\n{text}".encode("utf-8")).hexdigest()
+    cached = os.path.join(CAPTION_CACHE_DIR, f"{key}.png")
+    if os.path.exists(cached):
+        return np.array(Image.open(cached).convert("RGBA"))
+
+    size = max(12, int(frame_height * CAPTION_FONT_RATIO))
+    font = _font(size)
+    pad = size // 3
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    # Lines wider than the frame (e.g. 42 chars on a 512 px still) wrap instead of being cut off
+    text = wrap_caption(text, font, frame_width - 2 * pad, measure)
+    left, top, right, bottom = measure.multiline_textbbox((0, 0), text, font=font, stroke_width=2, align="center")
+    width = min(frame_width, int(right - left) + 2 * pad)
+    height = min(frame_height, int(bottom - top) + 2 * pad)
+
+    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    draw.rounded_rectangle((0, 0, width - 1, height - 1), radius=pad, fill=(0, 0, 0, 150))
+    draw.multiline_text((pad - left, pad - top), text, font=font, fill=(255, 255, 255, 255),
+                        stroke_width=2, stroke_fill=(0, 0, 0, 255), align="center")
+    image.save(cached)
+    return np.array(image)
@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import socket
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip("requests")
+import hf_client
+
+IMAGE = b"\xff\xd8fake-jpeg" * 1000
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Plays `script` (one step per request) and then always succeeds; tracks concurrency."""
+    script = []
+    lock = threading.Lock()
+    requests = 0
+    in_flight = 0
+    max_in_flight = 0
+    delay = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        cls = type(self)
+        with cls.lock:
+            step = cls.script[cls.requests] if cls.requests < len(cls.script) else "ok"
+            cls.requests += 1
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(cls.delay)
+            if step == "loading":
+                self._reply(503, json.dumps({"error": "Model is currently loading", "estimated_time": 0.05}).encode())
+            elif step == "rate_limited":
+                self._reply(429, b'{"error": "rate limited"}', {"Retry-After": "0.05"})
+            elif step == "drop":
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(IMAGE)))
+                self.end_headers()
+                self.wfile.write(IMAGE[:1000])
+                self.wfile.flush()
+                self.connection.shutdown(socket.SHUT_RDWR)
+                self.close_connection = True
+            else:
+                self._reply(200, IMAGE)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    def start(script=(), delay=0.0):
+        handler = type("Handler", (StubHandler,), {"script": list(script), "requests": 0, "in_flight": 0,
+                                                   "max_in_flight": 0, "delay": delay, "lock": threading.Lock()})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}", handler
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_retries_loading_rate_limit_and_dropped_body(tmp_path, stub_server):
+    url, handler = stub_server(["loading", "rate_limited", "drop"])
+    filename = str(tmp_path / "image_1.jpg")
+    with hf_client.ImageAPIClient(url, "token", base_delay=0.01, max_delay=1.0) as client:
+        ok = asyncio.run(client.generate("a campus in 1926", filename))
+
+    assert ok
+    assert handler.requests == 4
+    assert client.stats["retries"] == 3
+    with open(filename, "rb") as f:
+        assert f.read() == IMAGE
+    assert not os.path.exists(filename + ".part")
+    assert os.listdir(tmp_path) == ["image_1.jpg"]
+
+def test_concurrency_stays_within_limit(tmp_path, stub_server):
+    url, handler = stub_server(delay=0.1)
+
+    async def run(client):
+        return await asyncio.gather(*(client.generate(f"prompt {i}", str(tmp_path / f"image_{i}.jpg"))
+                                      for i in range(8)))
+
+    with hf_client.ImageAPIClient(url, None, max_concurrency=2) as client:
+        start = time.perf_counter()
+        results = asyncio.run(run(client))
+        elapsed = time.perf_counter() - start
+
+    assert all(results)
+    assert handler.max_in_flight == 2
+    assert client.stats["bytes"] == 8 * len(IMAGE)
+    assert elapsed < 8 * 0.1  # requests overlap rather than running one at a time
@@ -0,0 +1,34 @@
+import os
+import pytest
+import pipeline
+
+@pytest.fixture
+def stage_dir(tmp_path, monkeypatch):
+    """Makes throwaway stage modules importable by the `-X importtime` subprocess."""
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, [str(tmp_path), os.getenv("PYTHONPATH")])))
+    monkeypatch.setattr(pipeline, "HEAVY_MODULES", pipeline.HEAVY_MODULES + ["fake_heavy"])
+    (tmp_path / "fake_heavy.py").write_text("")
+    return tmp_path
+
+def test_stage_modules_start_within_budget():
+    # Stages whose own dependencies are missing here are covered by the strict CLI run
+    assert pipeline.check_startup(allow_missing=True) == 0
+
+def test_eager_heavy_import_fails(stage_dir):
+    (stage_dir / "eager_stage.py").write_text("import fake_heavy\n")
+    (stage_dir / "lazy_stage.py").write_text("def run():\n    import fake_heavy\n")
+    assert pipeline.check_startup(["eager_stage"]) == 1
+    assert pipeline.check_startup(["lazy_stage"]) == 0
+
+def test_import_failure_fails_unless_allowed(stage_dir):
+    (stage_dir / "broken_stage.py").write_text("import not_installed_anywhere\n")
+    assert pipeline.check_startup(["broken_stage"]) == 1
+    assert pipeline.check_startup(["broken_stage"], allow_missing=True) == 0
+
+def test_cli_exit_code(stage_dir, monkeypatch):
+    (stage_dir / "broken_stage.py").write_text("import not_installed_anywhere\n")
+    monkeypatch.setattr(pipeline, "STAGE_MODULES", ["broken_stage"])
+    with pytest.raises(SystemExit) as exit_info:
+        pipeline.main(["check-startup"])
+    assert exit_info.value.code == 1
+    pipeline.main(["check-startup", "--allow-missing"])
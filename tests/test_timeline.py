@@ -0,0 +1,91 @@
+import os
+import json
+import stat
+import threading
+import tracemalloc
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+import subtitles
+import timeline
+
+FRAME_SIZE = (640, 360)   # ~690 KB per decoded still, so a leak of 1000 is unmissable
+FPS = 10
+CAPTION_TEXTS = ["The school opened in 1926.", "Mining was its first subject.", "Students came from afar."]
+
+def fake_ffmpeg(tmp_path, script="cat > /dev/null"):
+    """An 'ffmpeg' that just drains the raw frames from stdin (or runs `script` instead)."""
+    path = tmp_path / "ffmpeg"
+    path.write_text(f"#!/bin/sh\n{script}\n")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+def open_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+def make_plan(assets_dir, segments):
+    """Real stills, caption timings and (empty) audio files, as gen_assets_real leaves them."""
+    os.makedirs(assets_dir, exist_ok=True)
+    plan = {"segments": []}
+    for i in range(1, segments + 1):
+        narration = CAPTION_TEXTS[i % len(CAPTION_TEXTS)]
+        Image.new("RGB", FRAME_SIZE, (i % 256, 80, 120)).save(os.path.join(assets_dir, f"image_{i}.jpg"))
+        open(os.path.join(assets_dir, f"audio_{i}.mp3"), "wb").close()
+        words = [{"text": w, "start": n * 0.04, "end": n * 0.04 + 0.03} for n, w in enumerate(narration.split())]
+        with open(os.path.join(assets_dir, f"captions_{i}.json"), "w") as f:
+            json.dump(words, f)
+        plan["segments"].append({"id": i, "narration": narration})
+    return plan
+
+@pytest.fixture
+def stubbed(tmp_path, monkeypatch):
+    """Stubs only the external processes: ffprobe, the concat audio pass and the encoder binary."""
+    fd_samples = []
+    def probe_duration(path):
+        fd_samples.append(open_fds())  # taken as each segment starts loading
+        return 0.2
+    monkeypatch.setattr(timeline, "probe_duration", probe_duration)
+    monkeypatch.setattr(timeline, "concat_audio", lambda entries, output_path: None)
+    monkeypatch.setattr(subtitles, "CAPTION_CACHE_DIR", str(tmp_path / "captions"))
+    return fd_samples
+
+def render(entries, tmp_path):
+    tracemalloc.start()
+    try:
+        timeline.render_timeline(entries, str(tmp_path / "out.mp4"), fps=FPS, frame_size=FRAME_SIZE)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to count file descriptors")
+def test_memory_and_handles_constant_over_1000_segments(tmp_path, monkeypatch, stubbed):
+    monkeypatch.setattr(timeline, "ffmpeg_binary", lambda: fake_ffmpeg(tmp_path))
+    assets_dir = str(tmp_path / "assets")
+    entries = timeline.timeline_entries(make_plan(assets_dir, 1000), assets_dir)
+    assert len(entries) == 1000
+
+    short_peak = render(entries[:50], tmp_path)
+    short_fds = list(stubbed)
+    stubbed.clear()
+    fds_before = open_fds()
+    long_peak = render(entries, tmp_path)
+    long_fds = list(stubbed)
+
+    # 20x the segments must not mean more memory: only the decode-ahead window is ever live
+    assert long_peak < short_peak * 1.5
+    assert long_peak < (timeline.DECODE_AHEAD + 4) * FRAME_SIZE[0] * FRAME_SIZE[1] * 3
+    # Every still and caption file opened by load_segment is closed again
+    assert max(long_fds) - min(long_fds) <= 2
+    assert max(long_fds) <= max(short_fds) + 2
+    assert open_fds() == fds_before
+
+def test_dead_encoder_stops_the_decode_thread(tmp_path, monkeypatch, stubbed):
+    monkeypatch.setattr(timeline, "ffmpeg_binary", lambda: fake_ffmpeg(tmp_path, "exit 1"))
+    assets_dir = str(tmp_path / "assets")
+    entries = timeline.timeline_entries(make_plan(assets_dir, 40), assets_dir)
+    threads_before = threading.active_count()
+
+    with pytest.raises((BrokenPipeError, RuntimeError)):
+        timeline.render_timeline(entries, str(tmp_path / "out.mp4"), fps=FPS, frame_size=FRAME_SIZE)
+    assert threading.active_count() == threads_before
@@ -0,0 +1,78 @@
+import re
+import math
+import json
+import os
+from collections import Counter
+
+# --- CONFIGURATION ---
+IMAGE_INDEX_FILE = "image_index.json"
+TERMS_PER_ARTICLE = 40    # most frequent terms kept per article folder
+YEAR_WEIGHT = 0.15        # score lost per year of distance
+MAX_YEAR_DIFF = 15
+
+STOPWORDS = set("""
+a an and are as at be been but by for from has have he her his i in is it its of on or our she
+that the their them they this to was were which who will with we you your not no also than then
+there these those into about after before over more most such can could would should may new one
+two all any said says
+""".split())
+
+def tokenize(text):
+    """Lower-cased word terms without stopwords; 4-digit years are kept as terms."""
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if len(t) > 2 and t not in STOPWORDS]
+
+def article_terms(text, limit=TERMS_PER_ARTICLE):
+    return [term for term, _ in Counter(tokenize(text)).most_common(limit)]
+
+def build_index(assets):
+    """Inverted index term -> [image paths] over each asset's `terms`."""
+    postings = {}
+    for asset in assets:
+        for term in set(asset.get('terms', [])):
+            postings.setdefault(term, []).append(asset['path'])
+    return {"documents": len(assets), "postings": postings}
+
+def save_index(index, path=IMAGE_INDEX_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+
+def load_index(path=IMAGE_INDEX_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def asset_year(asset):
+    try:
+        return int(asset['date'].split('-')[0])
+    except:
+        return None
+
+def query_index(index, assets_by_path, narration, target_year, used_images):
+    """Best unused image by idf-weighted term overlap with `narration` plus year proximity.
+
+    Only the postings of the narration's terms are visited, never the whole asset list.
+    Returns None when no candidate shares a term and sits within MAX_YEAR_DIFF years.
+    """
+    scores = Counter()
+    documents = max(1, index['documents'])
+    for term in set(tokenize(narration)):
+        paths = index['postings'].get(term)
+        if not paths:
+            continue
+        idf = math.log(1 + documents / len(paths))
+        for path in paths:
+            scores[path] += idf
+
+    best_match, best_score = None, float('-inf')
+    for path, overlap in scores.items():
+        asset = assets_by_path.get(path)
+        if asset is None or path in used_images:
+            continue
+        year = asset_year(asset)
+        if year is None or abs(year - target_year) >= MAX_YEAR_DIFF:
+            continue
+        score = overlap - YEAR_WEIGHT * abs(year - target_year)
+        if score > best_score:
+            best_match, best_score = asset, score
+    return best_match
@@ -0,0 +1,197 @@
+import os
+import queue
+import tempfile
+import threading
+import subprocess
+import numpy as np
+from PIL import Image
+from duration_planner import probe_duration
+from output_profiles import ffmpeg_binary
+from subtitles import captions_path, load_timings, group_captions, render_caption
+
+# --- CONFIGURATION ---
+DECODE_AHEAD = 4              # segments decoded ahead of the encoder
+CAPTION_MARGIN_RATIO = 0.08
+
+# Streaming timeline engine for very long plans. Unlike the MoviePy path it never holds
+# more than DECODE_AHEAD + 2 decoded stills (the queued window, the one being encoded and
+# the one being decoded), and no source file stays open once its segment is loaded, so
+# memory and file handles are constant in the timeline length.
+
+def timeline_entries(plan, assets_dir):
+    """Cheap per-segment descriptors (paths only, nothing opened)."""
+    entries = []
+    for segment in plan['segments']:
+        seg_id = segment['id']
+        audio_path = os.path.join(assets_dir, f"audio_{seg_id}.mp3")
+        image_path = os.path.join(assets_dir, f"image_{seg_id}.jpg")
+        if not os.path.exists(audio_path) or not os.path.exists(image_path):
+            print(f"Skipping Segment {seg_id}: Missing audio or image files.")
+            continue
+        entries.append({"id": seg_id, "audio": audio_path, "image": image_path, "narration": segment.get('narration')})
+    return entries
+
+def fit_frame(image, frame_size):
+    """Letterboxes a still into the fixed output frame."""
+    frame_width, frame_height = frame_size
+    scale = min(frame_width / image.width, frame_height / image.height)
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    canvas = Image.new("RGB", frame_size)
+    canvas.paste(image.resize(size, Image.BILINEAR), ((frame_width - size[0]) // 2, (frame_height - size[1]) // 2))
+    return np.asarray(canvas)
+
+def load_segment(entry, frame_size, burn_in_captions=True):
+    """Decodes one segment's still and caption overlays; all files are closed on return."""
+    duration = probe_duration(entry["audio"])
+    if duration is None:
+        raise RuntimeError(f"Could not read audio duration for segment {entry['id']}")
+    with Image.open(entry["image"]) as image:
+        frame = fit_frame(image.convert("RGB"), frame_size)
+    captions = group_captions(load_timings(captions_path(entry["audio"]), entry.get("narration")))
+    overlays = []
+    if burn_in_captions:
+        for caption in captions:
+            overlays.append((caption["start"], caption["end"], render_caption(caption["text"], *frame_size)))
+    return {"id": entry["id"], "duration": duration, "frame": frame, "captions": captions, "overlays": overlays}
+
+def composite(frame, rgba, frame_size):
+    """Alpha-blends a caption onto a copy of the still (done once per caption, not per frame)."""
+    frame_width, frame_height = frame_size
+    out = frame.copy()
+    h, w = rgba.shape[:2]
+    x = (frame_width - w) // 2
+    y = frame_height - h - int(frame_height * CAPTION_MARGIN_RATIO)
+    alpha = rgba[:, :, 3:4].astype(np.float32) / 255.0
+    region = out[y:y + h, x:x + w].astype(np.float32)
+    out[y:y + h, x:x + w] = (rgba[:, :, :3] * alpha + region * (1 - alpha)).astype(np.uint8)
+    return out
+
+def segment_frames(segment, start_frame, end_frame, fps, frame_size):
+    """Yields raw RGB frame bytes; identical frames reuse the same buffer."""
+    plain = segment["frame"].tobytes()
+    current_key, current = None, plain
+    offset = start_frame / fps
+    for n in range(start_frame, end_frame):
+        t = n / fps - offset
+        key = None
+        for i, (start, end, _) in enumerate(segment["overlays"]):
+            if start <= t < end:
+                key = i
+                break
+        if key != current_key:
+            current_key = key
+            current = plain if key is None else composite(segment["frame"], segment["overlays"][key][2], frame_size).tobytes()
+        yield current
+
+class DecodeAhead:
+    """Loads segments on a background thread into a bounded window, in playback order."""
+
+    def __init__(self, entries, loader, window=DECODE_AHEAD):
+        self.window = queue.Queue(maxsize=window)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(entries, loader), daemon=True)
+        self.thread.start()
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.window.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, entries, loader):
+        for entry in entries:
+            try:
+                item = loader(entry)
+            except Exception as e:
+                self._put(e)
+                return
+            if not self._put(item):
+                return
+        self._put(None)
+
+    def close(self):
+        """Stops the loader thread early (e.g. the encoder died) and drops what it decoded."""
+        self.stopped.set()
+        while True:
+            try:
+                self.window.get_nowait()
+            except queue.Empty:
+                break
+        self.thread.join()
+
+    def __iter__(self):
+        while True:
+            item = self.window.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+def concat_audio(entries, output_path):
+    """One ffmpeg concat-demuxer pass; it opens each mp3 in turn, never all at once."""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        list_path = f.name
+        for entry in entries:
+            f.write("file '{}'\n".format(os.path.abspath(entry["audio"]).replace("'", "'\\''")))
+    try:
+        subprocess.run([
+            ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+            "-i", list_path, "-c:a", "aac", "-b:a", "192k", output_path,
+        ], check=True)
+    finally:
+        os.remove(list_path)
+
+def detect_frame_size(entries):
+    with Image.open(entries[0]["image"]) as image:
+        width, height = image.size
+    return (width // 2 * 2, height // 2 * 2)
+
+def render_timeline(entries, output_video, fps=24, frame_size=None, window=DECODE_AHEAD,
+                    burn_in_captions=True, loader=None):
+    """Streams the timeline into libx264. Returns the captions shifted onto the global timeline."""
+    frame_size = frame_size or detect_frame_size(entries)
+    loader = loader or (lambda entry: load_segment(entry, frame_size, burn_in_captions))
+
+    audio_path = os.path.splitext(output_video)[0] + "_narration.m4a"
+    concat_audio(entries, audio_path)
+
+    encoder = subprocess.Popen([
+        ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{frame_size[0]}x{frame_size[1]}", "-r", str(fps), "-i", "-",
+        "-i", audio_path, "-map", "0:v", "-map", "1:a", "-c:a", "copy",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-movflags", "+faststart", output_video,
+    ], stdin=subprocess.PIPE)
+
+    srt_captions = []
+    elapsed = 0.0
+    frames_written = 0
+    ahead = DecodeAhead(entries, loader, window)
+    try:
+        for segment in ahead:
+            # Frame boundaries follow the cumulative audio clock so long timelines never drift
+            end_frame = round((elapsed + segment["duration"]) * fps)
+            for data in segment_frames(segment, frames_written, end_frame, fps, frame_size):
+                encoder.stdin.write(data)
+            srt_captions.extend(
+                {**c, "start": c["start"] + elapsed, "end": c["end"] + elapsed} for c in segment["captions"]
+            )
+            elapsed += segment["duration"]
+            frames_written = end_frame
+            # `segment` (and its decoded still) is released on the next iteration
+    finally:
+        ahead.close()
+        try:
+            encoder.stdin.close()
+        except BrokenPipeError:
+            pass
+        encoder.wait()
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+
+    if encoder.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {encoder.returncode}")
+    return srt_captions